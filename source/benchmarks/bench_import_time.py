@@ -0,0 +1,76 @@
+# %%
+# Python modules.
+import sys, tempfile, subprocess, argparse
+
+# Modules which are slow to import and should only load when they are used.
+HEAVY_MODULES = ["yfinance", "altair", "scipy", "requests", "lxml"]
+
+# Import statements to time. Each one runs in a fresh interpreter.
+IMPORTS = {
+	"aggregation only": "import source.modules.compute_aggregations",
+	"visuals only": "import source.modules.explore_visuals",
+	"package": "import source.modules",
+	"dependencies (pandas + yfinance + altair)": "import pandas, yfinance, altair",
+}
+
+# Runs in the child interpreter. Prints the import time and the heavy modules it loaded.
+SNIPPET = """
+import sys, time
+t = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - t
+print(elapsed, ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+
+# %%
+def time_import(statement:str, repeat:int=5, cwd:str=None):
+	'''Best of (repeat) cold import times in seconds and the heavy modules loaded.'''
+
+	timings, loaded = [], ""
+	for _ in range(repeat):
+		result = subprocess.run(
+			[sys.executable, "-c", SNIPPET.format(statement=statement, heavy=HEAVY_MODULES)],
+			capture_output=True, text=True, check=True, cwd=cwd,
+		)
+		elapsed, _, loaded = result.stdout.strip().partition(" ")
+		timings.append(float(elapsed))
+
+	return min(timings), loaded
+
+
+def export_tree(ref:str, directory:str):
+	'''Write the project files at the git (ref) into the directory.'''
+
+	archive = subprocess.run(["git", "archive", ref], capture_output=True, check=True).stdout
+	subprocess.run(["tar", "-x", "-C", directory], input=archive, check=True)
+
+
+def print_timings(label:str, repeat:int, cwd:str=None):
+	for name, statement in IMPORTS.items():
+		try:
+			elapsed, loaded = time_import(statement, repeat, cwd)
+		except subprocess.CalledProcessError as e:
+			print(f"{label:<10} {name:<45} {'failed':>8}  {e.stderr.strip().splitlines()[-1]}")
+			continue
+		print(f"{label:<10} {name:<45} {elapsed:>8.3f}  {loaded or '-'}")
+
+
+def main(argv:list=None):
+	parser = argparse.ArgumentParser(description="Benchmark the cold import time of the modules package. Run from the main project directory.")
+	parser.add_argument("--repeat", type=int, default=5, help="Number of fresh interpreters per import.")
+	parser.add_argument("--baseline", default=None, help="Git ref to time the same imports on, e.g. the commit before the lazy imports.")
+	args = parser.parse_args(argv)
+
+	print(f"{'tree':<10} {'import':<45} {'seconds':>8}  heavy modules loaded")
+	print_timings("current", args.repeat)
+
+	if args.baseline is not None:
+		with tempfile.TemporaryDirectory() as directory:
+			export_tree(args.baseline, directory)
+			print_timings(args.baseline, args.repeat, cwd=directory)
+
+
+if __name__ == "__main__":
+	main()
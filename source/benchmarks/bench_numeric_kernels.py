@@ -0,0 +1,128 @@
+# %%
+# Python modules.
+import time, argparse
+import numpy as np
+import pandas as pd
+
+# Custom modules.
+from source.modules.numeric_kernels import rolling_mean_std, rolling_median, masked_group_means, get_backend
+
+# Custom configuration.
+from source.config.config import TICKER_TO_COLLECT
+
+# Roughly the number of trading days between (1998-12-01) and (2021-12-17).
+N_DAYS = 5800
+
+
+
+# %%
+def make_data(n_tickers:int, n_days:int, n_factors:int, seed:int=0):
+	'''Synthetic ticker history shaped like the consolidated data (stage 2).'''
+
+	rng = np.random.default_rng(seed)
+	n = n_tickers * n_days
+
+	df = pd.DataFrame({
+		"ticker": np.repeat([f"T{i:05d}" for i in range(n_tickers)], n_days),
+		"price_chg_c2c": rng.normal(0, 0.01, n),
+		"volume": rng.integers(1e5, 1e7, n).astype(float),
+	})
+	df.loc[rng.random(n) < 0.001, "price_chg_c2c"] = np.nan
+
+	# Event flags are shared by all the tickers on the same day.
+	flags = (rng.random((n_days, n_factors)) < 0.05).astype(np.int8)
+	return df, np.tile(flags, (n_tickers, 1))
+
+
+
+# %%
+# The pandas operations the kernels replace.
+def pandas_rolling(df:pd.DataFrame):
+	grouped = df.groupby("ticker", sort=False)
+	mean = grouped["price_chg_c2c"].transform(lambda s: s.rolling(window=360, min_periods=360).mean())
+	std = grouped["price_chg_c2c"].transform(lambda s: s.rolling(window=360, min_periods=360).std(ddof=1))
+	median = grouped["volume"].transform(lambda s: s.rolling(window=90, min_periods=90).median())
+	return mean.to_numpy(), std.to_numpy(), median.to_numpy()
+
+
+def pandas_masked_means(df:pd.DataFrame, flags:np.ndarray, period:int):
+	means = []
+	for f in range(flags.shape[1]):
+		means.append(df.loc[flags[:, f] == period, :].groupby("ticker")["price_chg_c2c"].mean())
+	return pd.concat(means, axis="columns").to_numpy()
+
+
+def kernel_rolling(df:pd.DataFrame, backend:str):
+	mean, std, median = [], [], []
+	for _, df_ticker in df.groupby("ticker", sort=False):
+		m, s = rolling_mean_std(df_ticker["price_chg_c2c"], window=360, backend=backend)
+		mean.append(m)
+		std.append(s)
+		median.append(rolling_median(df_ticker["volume"], window=90, backend=backend))
+	return np.concatenate(mean), np.concatenate(std), np.concatenate(median)
+
+
+def kernel_masked_means(df:pd.DataFrame, flags:np.ndarray, period:int, backend:str):
+	codes, tickers = pd.factorize(df["ticker"], sort=True)
+	return masked_group_means(df["price_chg_c2c"], codes, len(tickers), flags, period, backend=backend)
+
+
+
+# %%
+def check_parity(backends:list, n_factors:int):
+	'''Compare every backend against pandas on data at the current ticker count.'''
+
+	df, flags = make_data(len(TICKER_TO_COLLECT), N_DAYS, n_factors)
+	expected_rolling = pandas_rolling(df)
+	expected_means = pandas_masked_means(df, flags, 1)
+
+	for backend in backends:
+		for expected, actual in zip(expected_rolling, kernel_rolling(df, backend)):
+			np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-12)
+		np.testing.assert_allclose(kernel_masked_means(df, flags, 1, backend), expected_means, rtol=1e-9, atol=1e-12)
+		print(f"Parity with pandas: {backend} ok")
+
+
+def time_call(func, *args):
+	t = time.perf_counter()
+	func(*args)
+	return time.perf_counter() - t
+
+
+def main(argv:list=None):
+	parser = argparse.ArgumentParser(description="Benchmark the numeric kernels against pandas. Run from the main project directory.")
+	parser.add_argument("--scales", type=int, nargs="+", default=[10, 100, 1000], help="Multiples of the current ticker count.")
+	parser.add_argument("--days", type=int, default=N_DAYS, help="Trading days per ticker.")
+	parser.add_argument("--factors", type=int, default=20, help="Number of event flags. The flags take (tickers x days x factors) bytes.")
+	parser.add_argument("--skip-pandas", action="store_true", help="Only time the kernels. The pandas baseline is slow at the larger scales.")
+	args = parser.parse_args(argv)
+
+	backends = ["numpy"] + (["numba"] if get_backend("auto") == "numba" else [])
+	check_parity(backends, args.factors)
+
+	# Compile the numba kernels before timing.
+	df, flags = make_data(2, 400, 2)
+	for backend in backends:
+		kernel_rolling(df, backend)
+		kernel_masked_means(df, flags, 1, backend)
+
+	print(f"{'scale':>6} {'tickers':>8} {'stage':<8} {'pandas':>9} " + " ".join(f"{b:>9} {'speedup':>8}" for b in backends))
+	for scale in args.scales:
+		n_tickers = len(TICKER_TO_COLLECT) * scale
+		df, flags = make_data(n_tickers, args.days, args.factors)
+
+		stages = {
+			"rolling": (pandas_rolling, (df,), kernel_rolling, (df,)),
+			"means": (pandas_masked_means, (df, flags, 1), kernel_masked_means, (df, flags, 1)),
+		}
+		for stage, (baseline, baseline_args, kernel, kernel_args) in stages.items():
+			baseline_time = np.nan if args.skip_pandas else time_call(baseline, *baseline_args)
+			row = f"{scale:>5}x {n_tickers:>8} {stage:<8} {baseline_time:>8.2f}s "
+			for backend in backends:
+				kernel_time = time_call(kernel, *kernel_args, backend)
+				row += f"{kernel_time:>8.2f}s {baseline_time / kernel_time:>7.1f}x "
+			print(row)
+
+
+if __name__ == "__main__":
+	main()
@@ -74,6 +74,37 @@ METRIC_CHOICES = [
 	"volume_pchg_from_med_abv_1", 
 ]
 
+# Metrics to compute the pairwise co-movement across the tickers on the event dates. 
+COMOVEMENT_MEASURES = ["price_chg_c2c", "tscore_c2c"] 
+
+# Backend for the rolling statistics and the aggregations. 
+# auto = Use numba if it's installed, otherwise numpy. 
+# numba = Compiled kernels (requires numba). 
+# numpy = Vectorised numpy only. 
+NUMERIC_BACKEND = "auto" 
+
+# Number of rendered charts to keep in memory before evicting the least recently used. 
+CHART_CACHE_SIZE = 64 
+
+# How altair should pass the chart data to the renderer instead of inlining it into the notebook. 
+# data_server = Serve the data by reference from a local server (requires altair-data-server). 
+# json = Write the data to json files inside CHART_DATA_DIR and reference them by url. 
+# default = Inline the data into the chart spec. 
+CHART_DATA_TRANSFORMER = "data_server" 
+
+# The json files are written next to the notebooks so the frontend can resolve their url. 
+# CHART_NOTEBOOK_DIR is relative to the project directory, CHART_DATA_DIR to the notebook directory. 
+# Only the most recent CHART_DATA_MAX_FILES files are kept. 
+CHART_NOTEBOOK_DIR = "source/notebook" 
+CHART_DATA_DIR = "altair_data" 
+CHART_DATA_MAX_FILES = 256 
+
+# Local query service over the aggregates (stage 3). 
+QUERY_SERVICE_HOST = "127.0.0.1" 
+QUERY_SERVICE_PORT = 8765 
+QUERY_CACHE_SIZE = 256 
+QUERY_MAX_CONCURRENCY = 4 
+
 # Recession data. To be parsed into Pandas DataFrame. 
 RECESSIONS = {
 	"recession"	: ["Covid 2019", "DebtCrisis 2008", "DotCom 2001"], 
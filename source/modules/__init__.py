@@ -0,0 +1,45 @@
+# %%
+# Python modules.
+import importlib
+
+# Public API. Each name is imported from its module on first access, so importing
+# the package doesn't load pandas, yfinance or altair until they are needed.
+_EXPORTS = {
+	"ManageDataset": "source.modules.manage_dataset",
+	"LRUCache": "source.modules.manage_cache",
+	"EventIndex": "source.modules.event_index",
+	"GetTickerData": "source.modules.get_tickerdata",
+	"GetImpVolatility": "source.modules.get_tickerdata",
+	"ProcessTickerData": "source.modules.process_tickerdata",
+	"ProcessImpVolatility": "source.modules.process_tickerdata",
+	"ProcessNewsData": "source.modules.process_newsdata",
+	"GetEventDates": "source.modules.consolidate_eventdates",
+	"ConsolidateDates": "source.modules.consolidate_eventdates",
+	"AggregateMeasures": "source.modules.compute_aggregations",
+	"IdentifyConvergence": "source.modules.compute_aggregations",
+	"ComputeCoMovement": "source.modules.compute_comovement",
+	"PipelineRunner": "source.modules.run_pipeline",
+	"AggregateQueryService": "source.modules.query_aggregates",
+	"AggregateQueryServer": "source.modules.query_aggregates",
+	"AggregateQueryClient": "source.modules.query_aggregates",
+	"plot_heatmap": "source.modules.explore_visuals",
+	"plot_timeseries": "source.modules.explore_visuals",
+	"plot_boxplot": "source.modules.explore_visuals",
+}
+
+__all__ = list(_EXPORTS)
+
+
+
+# %%
+def __getattr__(name:str):
+	if name not in _EXPORTS:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+	value = getattr(importlib.import_module(_EXPORTS[name]), name)
+	globals()[name] = value
+	return value
+
+
+def __dir__():
+	return sorted(list(globals()) + __all__)
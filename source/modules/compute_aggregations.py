@@ -5,8 +5,9 @@ import pandas as pd
 import numpy as np 
 
 # Custom modules. 
-from source.modules.consolidate_eventdates import *
-from source.modules.compute_aggregations import * 
+from source.modules.manage_dataset import ManageDataset 
+from source.modules.consolidate_eventdates import ConsolidateDates 
+from source.modules.numeric_kernels import masked_group_means 
 
 # Custom configuration.
 from source.config.config import (
@@ -14,6 +15,7 @@ from source.config.config import (
 	METRICS_TO_IDENTIFY_CONVERGENCE, METRIC_CHOICES
 )
 
+__all__ = ["AggregateMeasures", "IdentifyConvergence"]
 
 
 # %%
@@ -52,91 +54,48 @@ class AggregateMeasures(ManageDataset):
 		# An empty dataframe to consolidate all the aggregates for different metrics. 
 		df_consolidated_agg = pd.DataFrame() 
 
-		# To store the ticker and factor values. 
-		arr_tickers, arr_factors = [], [] 
+		# Encode the tickers (sorted, as the pivot tables were) and gather the event flags once. 
+		ticker_codes, tickers = pd.factorize(df_tickers["ticker"], sort=True) 
+		flags = df_tickers[self.factors].to_numpy() 
 
-		# Start consolidating the aggregates. This will take a while. 
+		# Start consolidating the aggregates. 
 		for intent_measure, metrics in intent_measure.items(): 
 
 			# Define what we want to measure. 
 			for metric in metrics: 
+				values = df_tickers[metric].to_numpy(dtype=float) 
 
-				# Define whether to measure the event or non-occuring event period. 
-				for measure_event_period in [0, 1]: 
-
-					# Define the variable to assign as the pivot value. 
-					pivot_value = metric
-
-					# Define the the aggregate function and the name for the aggregated value. 
-					aggvalue_name, aggfunc = metric, np.mean 
-
-					# Define the positive threshold for probability count. 
-					prob_threshold = 0 
-
-					# An empty dataframe to consolidate all the pivot tables. 
-					df_aggregates = pd.DataFrame() 
-
-					# Consolidate all the pivot tables. 
-					for factor in self.factors: 
-						# Remove event or non-occuring event period (either 1 or 0) for that factor. 
-						df_processed = df_tickers.loc[df_tickers[factor] == measure_event_period, :] 
-
-						# Convert all negative to positive unless we are looking to measure 
-						# the directional probability or distance from the threshold. 
-						if intent_measure == "mag": 
-							df_processed.loc[:, pivot_value] = df_processed.loc[:, pivot_value].abs() 
-
-						# To compute directional probabilities, we need to conver the negatives to 0 
-						# and positives to 1 before aggregating it with the mean. 
-						if intent_measure in ["dir", "abv"]: 
-							df_processed.loc[df_processed[pivot_value] <= prob_threshold, pivot_value] = 0 
-							df_processed.loc[df_processed[pivot_value] >  prob_threshold, pivot_value] = 1 
-
-						# Convert to pivot table. Average the value across entire the timeframe. 
-						df_pivottable = df_processed.pivot_table(values=pivot_value, index="ticker", columns=factor, aggfunc=aggfunc) 
-
-						# Rename the column heading. 
-						df_pivottable.columns.name = "factor" 
-
-						# Rename the column. There should be only 1 colume in this case. 
-						# The original column name will either be 0 or 1. 
-						try: 
-							df_pivottable.columns = [factor] 
-						except:
-							print("Failed on Metric: " + metric + " Factor: " + factor)
+				# Convert all negative to positive unless we are looking to measure 
+				# the directional probability or distance from the threshold. 
+				if intent_measure == "mag": 
+					values = np.abs(values) 
 
-						# Combine all the pivot tables into a single dataframe. 
-						df_aggregates = pd.concat([df_aggregates, df_pivottable], axis="columns") 
+				# To compute directional probabilities, we need to conver the negatives to 0 
+				# and positives to 1 before aggregating it with the mean. 
+				if intent_measure in ["dir", "abv"]: 
+					values = np.where(np.isnan(values), np.nan, (values > 0).astype(float)) 
 
-					# Convert into long table. 
-					df_aggregates = df_aggregates \
-						.reset_index(drop=False) \
-						.melt(id_vars="ticker", var_name="factor", value_vars=df_aggregates.columns, value_name=aggvalue_name) 
+				# Define whether to measure the event or non-occuring event period. 
+				for measure_event_period in [0, 1]: 
+					# Average the value per ticker across the timeframe for every factor at once. 
+					# The result is (ticker x factor). 
+					means = masked_group_means(values, ticker_codes, len(tickers), flags, measure_event_period) 
 
 					# Rename the metric name. Example (tscore_c2c) will be (tscore_c2c_mag) or 
 					# (price_chg_c2o) will be (price_chg_c2o_dir). 
 					metric_newname = f"{metric}_{intent_measure}_{measure_event_period}" 
-					df_aggregates = df_aggregates.rename(mapper={metric: metric_newname}, axis="columns") 
 
-					# Combine all the pivot tables into a single dataframe. 
-					df_consolidated_agg = pd.concat([df_consolidated_agg, df_aggregates[[metric_newname]]], axis="columns") 
-
-					if not arr_tickers and not arr_factors: 
-						arr_tickers = df_aggregates["ticker"].to_list() 
-						arr_factors = df_aggregates["factor"].to_list() 
+					# Convert into long table ordered by factor then ticker. 
+					df_consolidated_agg[metric_newname] = means.T.ravel() 
 
 				if intent_measure == "mag": 
 					# Compute the value difference between occurring event and non-occuring event. 
 					df_consolidated_agg[f"{metric}_{intent_measure}_diff"] = \
 						df_consolidated_agg[f"{metric}_{intent_measure}_1"] - df_consolidated_agg[f"{metric}_{intent_measure}_0"] 
 
-		# Add new columns for tickers and factors since the pivot table doesn't contain these columns. 
-		df_consolidated_agg["ticker"] = arr_tickers 
-		df_consolidated_agg["factor"] = arr_factors 
-
-		# Rearragne the columns. 
-		cols = ["ticker", "factor"] + df_consolidated_agg.columns[:-2].to_list() 
-		df_consolidated_agg = df_consolidated_agg[cols]
+		# Add the ticker and factor columns to the front. 
+		df_consolidated_agg.insert(0, "ticker", np.tile(tickers.to_numpy(), len(self.factors))) 
+		df_consolidated_agg.insert(1, "factor", np.repeat(self.factors, len(tickers))) 
 		return df_consolidated_agg
 
 
@@ -198,3 +157,26 @@ class AggregateMeasures(ManageDataset):
 		df_identified_convergence = df_identified_condition.loc[boo_conditions, cols + ["influential"]] 
 
 		return df_identified_convergence, df_identified_condition
+
+
+
+# %%
+class IdentifyConvergence(ManageDataset):
+	'''ManageDataset which stores the ticker and factor pairs identified as convergent from the aggregates'''
+
+	def __init__(
+			self, 
+			use_csv:bool=False, 
+			filename:str="sector_convergence.csv", 
+			aggregate_measures=None 
+		):
+
+		if use_csv == False:
+			# The aggregates to identify convergence from, use a provided instance or load the saved one. 
+			if aggregate_measures == None:
+				aggregate_measures = AggregateMeasures(use_csv=True, ticker_event_dates=ConsolidateDates(use_csv=True))
+
+			print("Identifying convergence")
+			self.df, _ = aggregate_measures.identify_convergence()
+
+		ManageDataset.__init__(self, filename, use_csv)
@@ -0,0 +1,117 @@
+# %%
+# Python modules.
+import numpy as np
+import pandas as pd
+
+# Custom modules.
+from source.modules.manage_dataset import ManageDataset
+from source.modules.consolidate_eventdates import ConsolidateDates
+
+# Custom configuration.
+from source.config.config import COMOVEMENT_MEASURES
+
+__all__ = ["ComputeCoMovement"]
+
+
+# %%
+def masked_products(flags:np.ndarray, a:np.ndarray, b:np.ndarray):
+	'''
+	(factor x ticker x ticker) sums of (a[:, i] * b[:, j]) over the dates flagged for each factor.
+	Computed as one matrix product of the flags with the (date x ticker pair) products.
+	'''
+
+	n_dates, n_factors = flags.shape
+	pairs = (a[:, :, None] * b[:, None, :]).reshape(n_dates, -1)
+	return (flags.T @ pairs).reshape(n_factors, a.shape[1], b.shape[1])
+
+
+
+# %%
+class ComputeCoMovement(ManageDataset):
+	'''
+	ManageDataset which stores the pairwise covariance and correlation between the tickers,
+	restricted to the dates flagged for each factor.
+	'''
+
+	def __init__(
+			self,
+			measures:list=COMOVEMENT_MEASURES,
+			use_csv:bool=False,
+			filename:str="sector_event_comovement.csv",
+			ticker_event_dates=None
+		):
+
+		# The source data set, use a provided instance or load the saved one.
+		if ticker_event_dates == None:
+			self.ticker_event_dates = ConsolidateDates(use_csv=True)
+		else:
+			self.ticker_event_dates = ticker_event_dates
+
+		# The full list of factors/ events from the source data.
+		self.factors = self.ticker_event_dates.event_dates.column_list
+
+		if use_csv == False:
+			print("Computing co-movement")
+			self.df = self.get_comovement(measures)
+
+		ManageDataset.__init__(self, filename, use_csv)
+
+
+	def get_comovement(self, measures:list):
+		df_tickers = self.ticker_event_dates.df
+
+		# Pivot into (date x ticker) once for all the measures.
+		df_pivoted = df_tickers.pivot(index="date", columns="ticker", values=measures)
+		tickers = df_pivoted[measures[0]].columns.to_list()
+
+		# The event flags are the same for every ticker on a date. The result is (date x factor).
+		flags = df_tickers.groupby("date")[self.factors].max().reindex(df_pivoted.index).fillna(0).to_numpy(dtype=float)
+
+		# Only keep each pair of tickers once.
+		i, j = np.triu_indices(len(tickers), k=1)
+		df_comovement = pd.DataFrame({
+			"factor": np.repeat(self.factors, len(i)),
+			"ticker_i": np.tile(np.array(tickers)[i], len(self.factors)),
+			"ticker_j": np.tile(np.array(tickers)[j], len(self.factors)),
+		})
+
+		for measure in measures:
+			cov, corr, n_obs = self.compute_masked_cov_corr(df_pivoted[measure].to_numpy(dtype=float), flags)
+
+			df_comovement[f"{measure}_n"] = n_obs[:, i, j].ravel().astype(int)
+			df_comovement[f"{measure}_cov"] = cov[:, i, j].ravel()
+			df_comovement[f"{measure}_corr"] = corr[:, i, j].ravel()
+
+		return df_comovement
+
+
+	def compute_masked_cov_corr(self, values:np.ndarray, flags:np.ndarray):
+		'''
+		Pairwise covariance and correlation of the (date x ticker) values for every factor, over the
+		flagged dates where both tickers have a value. Same as pandas cov() and corr() on each subset.
+		'''
+
+		# Center each ticker first. Doesn't change the result but keeps the sums precise.
+		valid = ~np.isnan(values)
+		x = np.where(valid, values - np.nanmean(values, axis=0), 0)
+		v = valid.astype(float)
+
+		# Sums over the dates where both tickers have a value. Each is (factor x ticker i x ticker j).
+		n = masked_products(flags, v, v)
+		sum_x = masked_products(flags, x, v)
+		sum_xy = masked_products(flags, x, x)
+		sum_xx = masked_products(flags, x * x, v)
+
+		# The sums for ticker j are the transpose of the sums for ticker i.
+		sum_y, sum_yy = sum_x.transpose(0, 2, 1), sum_xx.transpose(0, 2, 1)
+
+		with np.errstate(invalid="ignore", divide="ignore"):
+			cov = (sum_xy - sum_x * sum_y / n) / (n - 1)
+			var_x = (sum_xx - sum_x ** 2 / n) / (n - 1)
+			var_y = (sum_yy - sum_y ** 2 / n) / (n - 1)
+			corr = cov / np.sqrt(var_x * var_y)
+
+		# Need at least 2 dates to compute.
+		cov[n < 2] = np.nan
+		corr[n < 2] = np.nan
+		return cov, corr, n
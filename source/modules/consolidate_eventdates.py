@@ -1,14 +1,17 @@
 # %%
 # Python modules. 
+import os 
 import pandas as pd 
 
 # Custom modules. 
-from source.modules.manage_dataset import * 
-from source.modules.process_tickerdata import *
+from source.modules.manage_dataset import ManageDataset 
+from source.modules.process_tickerdata import ProcessTickerData 
+from source.modules.event_index import EventIndex 
 
 # Custom configuration.
-from source.config.config import EVENTS_FILENAMES
+from source.config.config import EVENTS_FILENAMES, DATASET_DIR
 
+__all__ = ["GetEventDates", "ConsolidateDates"]
 
 
 # %%
@@ -16,29 +19,82 @@ class GetEventDates(ManageDataset):
 	'''
 	A ManageDataset specific to holding dates of observances and events. 
 	Leverages Lionel's custom data CSVs which have a column per event and rows as dates of each event. 
+	The dates are normalised into an EventIndex which is cached on disk. It's rebuilt when the list of 
+	CSVs in EVENTS_FILENAMES or any of the CSVs changes. 
 	'''
-	def __init__(self): 
-		self.df = self.read_from_csv() 
-		self.column_list = self.df.columns.to_list() 
+	def __init__(
+		self, 
+		use_index:bool=True, 
+		filename:str="event_dates_index.npz", 
+		dataset_dir:str=DATASET_DIR, 
+		events_filenames:list=EVENTS_FILENAMES, 
+	): 
+		self.filename = filename 
+		self.dataset_dir = dataset_dir 
+		self.events_filenames = events_filenames 
+
+		self.index = self.read_from_index() if use_index else None 
+		if self.index is None or self.index.sources != self.get_sources(): 
+			self.index = EventIndex.from_frame(self.read_from_csv(), sources=self.get_sources()) 
+			self.write_to_index() 
+
+		self.df = self.index.to_frame() 
+		self.column_list = self.index.events.tolist() 
+
+
+	def dates_for(self, event:str): 
+		return self.index.dates_for(event) 
+
+
+	def events_on(self, date): 
+		return self.index.events_on(date) 
 
 	
 	def read_from_csv(self):
 		'''Overwrites default Dataset read opeartion to pull in the set of event data csvs'''
 
-		df_event_dates = pd.DataFrame() 
+		df_event_dates = [] 
 
 		# Read the data and consolidate all the event dates. 
-		for filename in EVENTS_FILENAMES: 
+		for filename in self.events_filenames: 
 			# Read the data. 
-			dates_df = ManageDataset(filename).df 
-
-			# Sort the dates. Just to ensure it's in order. 
-			event_dates = dates_df.sort_values(by=dates_df.columns.to_list())
+			dates_df = ManageDataset(filename, dataset_dir=self.dataset_dir).df 
 
-			# Concat the dataframe. 
-			df_event_dates = pd.concat([df_event_dates, event_dates], axis="columns") 
+			# Convert into long table. One (event, date) pair per row. 
+			event_dates = dates_df.melt(var_name="event", value_name="date").dropna(subset=["date"]) 
+			df_event_dates.append(event_dates) 
 			
-		return df_event_dates 
+		return pd.concat(df_event_dates, ignore_index=True) 
+
+
+	def read_from_index(self): 
+		'''Load the cached index. None if it hasn't been built yet.'''
+
+		self.get_ready_for_file_operation() 
+		filepath = os.path.join(self.dataset_dir, self.filename) 
+		if not os.path.exists(filepath): 
+			return None 
+
+		print(f"Read from ({self.filename})") 
+		return EventIndex.load(filepath) 
+
+
+	def write_to_index(self): 
+		print(f"Write to ({self.filename})") 
+
+		self.get_ready_for_file_operation() 
+		self.index.save(os.path.join(self.dataset_dir, self.filename)) 
+
+
+	def get_sources(self): 
+		'''The (filename, modified time in ns, size) of each event data csv. Compared against the cached index.'''
+
+		self.get_ready_for_file_operation() 
+		sources = [] 
+		for filename in self.events_filenames: 
+			stat = os.stat(os.path.join(self.dataset_dir, filename)) 
+			sources.append((filename, stat.st_mtime_ns, stat.st_size)) 
+		return sources 
 
 
 
@@ -61,22 +117,20 @@ class ConsolidateDates(ManageDataset):
 
 	def get_df_with_date_flags(self):
 		'''Runs processing steps to add event flags to ticker data for each of the two event datas.'''
-		df_consolidated_dates = self.add_event_flags(self.tickers.df, self.event_dates.df) 
+		df_consolidated_dates = self.add_event_flags(self.tickers.df, self.event_dates.index) 
 		return df_consolidated_dates
 
 
-	def add_event_flags(self, df_tickers:pd.DataFrame, df_event_dates:pd.DataFrame):
+	def add_event_flags(self, df_tickers:pd.DataFrame, event_index:EventIndex):
 		'''Adds boolean as integer columns for each event according to matching rows in ticker data.'''
 
-		for event_name in df_event_dates.columns: 
-			# Default to 0. 
-			df_tickers[event_name] = 0 
+		# Ensure the datetime is converted to str to be consistent with the saved csv. 
+		df_tickers["date"] = df_tickers["date"].astype(str) 
 
-			# Ensure the datetime is converted to str to be able to match dates. 
-			df_tickers["date"] = df_tickers["date"].astype(str) 
-			
-			# Filter non economic report dates and assign 1. 
-			boo_dates = df_tickers["date"].isin(df_event_dates[event_name].values) 
-			df_tickers.loc[boo_dates, event_name] = 1 
+		# Flag all the events in one pass. 1 if the event occurs on that date, otherwise 0. 
+		flags = event_index.flags(df_tickers["date"]) 
+		df_flags = pd.DataFrame(flags, columns=event_index.events, index=df_tickers.index) 
 
-		return df_tickers 
+		# Replace any existing flag columns. 
+		df_tickers = df_tickers.drop(columns=df_flags.columns, errors="ignore") 
+		return pd.concat([df_tickers, df_flags], axis="columns") 
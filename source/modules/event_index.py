@@ -0,0 +1,132 @@
+# %%
+# Python modules.
+import numpy as np
+import pandas as pd
+
+__all__ = ["EventIndex", "to_day_ordinals", "NAT_DAY"]
+
+# Day ordinal of a missing or unparseable date. The integer value of NaT, so it can't be a real day.
+NAT_DAY = np.datetime64("NaT", "D").astype(np.int64)
+
+
+# %%
+def to_day_ordinals(dates) -> np.ndarray:
+	'''Convert date strings or datetimes into day ordinals (days since 1970-01-01). Unparseable dates become NAT_DAY.'''
+
+	# Only the (yyyy-mm-dd) part is relevant. Avoids shifting the day when a timezone is attached.
+	dates = pd.Series(dates).astype(str).str[:10]
+	days = pd.to_datetime(dates, format="%Y-%m-%d", errors="coerce").values.astype("datetime64[D]")
+	return days.astype(np.int64)
+
+
+
+# %%
+class EventIndex():
+	'''
+	Normalised (event id x day ordinal) index of the event calendars. The entries are stored
+	sorted by event and then by day, deduplicated, with (indptr) marking where each event starts.
+	'''
+
+	def __init__(self, events:np.ndarray, indptr:np.ndarray, days:np.ndarray, sources:list=None) -> None:
+		self.events = np.asarray(events, dtype=str)
+		self.indptr = np.asarray(indptr, dtype=np.int64)
+		self.days = np.asarray(days, dtype=np.int32)
+
+		# The (filename, modified time in ns, size) of each file the index was built from.
+		self.sources = [] if sources is None else [(str(f), int(m), int(s)) for f, m, s in sources]
+
+		self.event_ids = {event: i for i, event in enumerate(self.events)}
+
+		# Secondary ordering by day for looking up the events on a given date.
+		self.entry_events = np.repeat(np.arange(len(self.events), dtype=np.int32), np.diff(self.indptr))
+		self.by_day = np.argsort(self.days, kind="stable")
+		self.sorted_days = self.days[self.by_day]
+
+
+	@classmethod
+	def from_frame(cls, df:pd.DataFrame, event:str="event", date:str="date", sources:list=None):
+		'''Build the index from a long table with one (event, date) pair per row.'''
+
+		# Keep the order the events first appear in. This is the order of the factors downstream.
+		events = pd.unique(df[event])
+		event_ids = pd.Categorical(df[event], categories=events).codes.astype(np.int64)
+		days = to_day_ordinals(df[date])
+
+		# Drop the missing dates, then sort and deduplicate on (event id, day).
+		valid = days != NAT_DAY
+		entries = np.unique(np.stack([event_ids[valid], days[valid]], axis=1).reshape(-1, 2), axis=0)
+		entry_events, entry_days = entries[:, 0], entries[:, 1]
+
+		indptr = np.zeros(len(events) + 1, dtype=np.int64)
+		indptr[1:] = np.cumsum(np.bincount(entry_events, minlength=len(events)))
+		return cls(events, indptr, entry_days.astype(np.int32), sources)
+
+
+	@classmethod
+	def load(cls, filepath:str):
+		with np.load(filepath, allow_pickle=False) as data:
+			sources = zip(data["source_files"], *data["source_stats"].T) if "source_files" in data else None
+			return cls(data["events"], data["indptr"], data["days"], sources)
+
+
+	def save(self, filepath:str):
+		# Uncompressed on purpose. Loading is a plain memory copy.
+		source_files = np.array([f for f, _, _ in self.sources], dtype=str)
+		source_stats = np.array([(m, s) for _, m, s in self.sources], dtype=np.int64).reshape(-1, 2)
+
+		with open(filepath, "wb") as f:
+			np.savez(
+				f, events=self.events, indptr=self.indptr, days=self.days, 
+				source_files=source_files, source_stats=source_stats,
+			)
+
+
+	def days_for(self, event:str) -> np.ndarray:
+		'''Sorted day ordinals of an event.'''
+
+		i = self.event_ids[event]
+		return self.days[self.indptr[i]:self.indptr[i + 1]]
+
+
+	def dates_for(self, event:str) -> np.ndarray:
+		'''Sorted dates of an event.'''
+
+		return self.days_for(event).astype("datetime64[D]")
+
+
+	def events_on(self, date) -> list:
+		'''Names of the events occurring on the date.'''
+
+		day = to_day_ordinals([date])[0]
+		lo, hi = np.searchsorted(self.sorted_days, day, side="left"), np.searchsorted(self.sorted_days, day, side="right")
+		return self.events[np.sort(self.entry_events[self.by_day[lo:hi]])].tolist()
+
+
+	def flags(self, dates) -> np.ndarray:
+		'''(date x event) matrix of 0 / 1 flags marking the events occurring on each of the dates.'''
+
+		query_days, inverse = np.unique(to_day_ordinals(dates), return_inverse=True)
+		if len(query_days) == 0:
+			return np.zeros((0, len(self.events)), dtype=np.int8)
+
+		# Locate each entry among the queried days and keep the exact matches.
+		pos = np.searchsorted(query_days, self.days)
+		pos_clipped = np.minimum(pos, len(query_days) - 1)
+		hit = (pos < len(query_days)) & (query_days[pos_clipped] == self.days)
+
+		flags = np.zeros((len(query_days), len(self.events)), dtype=np.int8)
+		flags[pos[hit], self.entry_events[hit]] = 1
+		return flags[inverse.ravel()]
+
+
+	def to_frame(self) -> pd.DataFrame:
+		'''Long table with one (event, date) pair per row.'''
+
+		return pd.DataFrame({
+			"event": self.events[self.entry_events],
+			"date": self.days.astype("datetime64[D]").astype(str),
+		})
+
+
+	def __len__(self):
+		return len(self.days)
@@ -1,15 +1,168 @@
 # %%
 # Python modules. 
+import os, copy, json, glob, hashlib, functools, inspect 
 import pandas as pd 
-import altair as alt 
+
+# Custom modules. 
+from source.modules.manage_cache import LRUCache, make_cache_key 
 
 # Custom configuration. 
-from source.config.config import RECESSIONS 
+from source.config import config 
+from source.config.config import (
+    RECESSIONS, CHART_CACHE_SIZE, CHART_DATA_TRANSFORMER, 
+    CHART_NOTEBOOK_DIR, CHART_DATA_DIR, CHART_DATA_MAX_FILES 
+)
+
+__all__ = [
+    "plot_heatmap", "plot_timeseries", "plot_boxplot", 
+    "enable_data_transformer", "clear_chart_data", "chart_cache", "ChartSpec", 
+]
+
+# Project directory. The notebooks change the working directory, so paths are resolved from here. 
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(config.__file__)))) 
+
+# Altair is imported inside each function on first use. It is slow to import 
+# and only needed when plotting. 
+
+
+
+# %%
+# Rendered chart specs keyed on (function, content hash of the plotted columns, arguments). 
+chart_cache = LRUCache(maxsize=CHART_CACHE_SIZE) 
+
+
+def get_chart_data_dir(): 
+    return os.path.join(PROJECT_DIR, CHART_NOTEBOOK_DIR, CHART_DATA_DIR) 
+
+
+def to_notebook_json(data): 
+    '''
+    Data transformer writing the data to a json file next to the notebooks. The url is relative to 
+    the notebook directory, regardless of the kernel's working directory. 
+    '''
+    import altair as alt 
+
+    if not isinstance(data, pd.DataFrame): 
+        return alt.utils.data.to_values(data) 
+
+    data_json = json.dumps(alt.utils.data.to_values(data)["values"]) 
+    filename = f"altair-data-{hashlib.sha1(data_json.encode()).hexdigest()}.json" 
+
+    data_dir = get_chart_data_dir() 
+    os.makedirs(data_dir, exist_ok=True) 
+    with open(os.path.join(data_dir, filename), "w") as f: 
+        f.write(data_json) 
+
+    clear_chart_data(keep=CHART_DATA_MAX_FILES) 
+    return {"url": f"{CHART_DATA_DIR}/{filename}", "format": {"type": "json"}} 
+
+
+def clear_chart_data(keep:int=0): 
+    '''Delete the json chart data files, except the (keep) most recently written.'''
+
+    filepaths = sorted(glob.glob(os.path.join(get_chart_data_dir(), "altair-data-*.json")), key=os.path.getmtime) 
+    for filepath in filepaths[:max(0, len(filepaths) - keep)]: 
+        os.remove(filepath) 
+
+
+def enable_data_transformer(name:str=CHART_DATA_TRANSFORMER): 
+    '''Pass the chart data by reference so the notebook doesn't hold a copy of every dataframe.'''
+    import altair as alt 
+
+    # Fall back to writing json files if the data server isn't installed. 
+    if name not in alt.data_transformers.names(): 
+        name = "json" 
+
+    if name == "json": 
+        alt.data_transformers.register("notebook_json", to_notebook_json) 
+        alt.data_transformers.enable("notebook_json") 
+    else: 
+        alt.data_transformers.enable(name) 
+
+    return name 
+
+
+class ChartSpec(): 
+    '''
+    Rendered chart spec. Displays like the altair chart, but only holds the spec and not the 
+    dataframe the chart was built from. 
+    '''
+
+    def __init__(self, spec:dict) -> None: 
+        self.spec = spec 
+
+
+    def to_dict(self): 
+        return copy.deepcopy(self.spec) 
+
+
+    def to_chart(self): 
+        '''Rebuild the altair chart, e.g. to edit it further. Slow for larger specs.'''
+        import altair as alt 
+
+        # The top level key tells the chart class, e.g. (layer) for a LayerChart. 
+        chart_classes = {"layer": alt.LayerChart, "vconcat": alt.VConcatChart, "hconcat": alt.HConcatChart, "concat": alt.ConcatChart} 
+        chart_class = next((c for key, c in chart_classes.items() if key in self.spec), alt.Chart) 
+        return chart_class.from_dict(self.to_dict(), validate=False) 
+
+
+    def _repr_mimebundle_(self, include=None, exclude=None): 
+        import altair as alt 
+        return alt.renderers.get()(self.spec) 
+
+
+def render_chart(func, *args, **kwargs): 
+    '''Build the chart and render its spec. The data is passed through the enabled data transformer.'''
+    import altair as alt 
+
+    if alt.data_transformers.active == "default": 
+        enable_data_transformer() 
+    return ChartSpec(func(*args, **kwargs).to_dict()) 
+
+
+def cache_chart(columns): 
+    '''
+    Memoise the rendered spec of a plotting function. (columns) maps the other call arguments to the 
+    columns of (df) the plot reads. Only those columns are hashed, so unrelated columns don't matter. 
+    '''
+
+    def decorator(func): 
+        signature = inspect.signature(func) 
+
+        @functools.wraps(func) 
+        def wrapper(*args, **kwargs): 
+            # Bind the defaults so positional and keyword calls share the same key. 
+            bound = signature.bind(*args, **kwargs) 
+            bound.apply_defaults() 
+            arguments = dict(bound.arguments) 
+            df = arguments.pop("df") 
+
+            # The cache must never break a valid call. Arguments which can't be keyed aren't cached. 
+            try: 
+                key = make_cache_key(func.__qualname__, df.loc[:, list(dict.fromkeys(columns(arguments)))], **arguments) 
+            except (TypeError, KeyError): 
+                key = None 
+
+            if key is None: 
+                return render_chart(func, *args, **kwargs) 
+
+            chart = chart_cache.get(key) 
+            if chart is None: 
+                chart = render_chart(func, *args, **kwargs) 
+                chart_cache.put(key, chart) 
+
+            return chart 
+
+        return wrapper 
+
+    return decorator 
 
 
 
 # %%
+@cache_chart(columns=lambda a: ["factor", a["x"], a["y"], a["z"]])
 def plot_heatmap(df:pd.DataFrame, x:str, y:str, z:str, factors:list, zlim:list=[0,1.5], format_text:str=".0f"): 
+    import altair as alt 
 
     # Example = (name_name_1) to ([name, name, 1]) to (name anem). 
     chart_title = " ".join( [s for s in z.split("_") if not s.isnumeric()] ) 
@@ -56,7 +209,9 @@ def plot_heatmap(df:pd.DataFrame, x:str, y:str, z:str, factors:list, zlim:list=[
 
 
 # %%
+@cache_chart(columns=lambda a: [a["x"], "ticker", a["factor"], a["measure"]])
 def plot_timeseries(df:pd.DataFrame, x:str, tickers:list, factor:str, measure:str, format_text:str=".1f"): 
+    import altair as alt 
 
     # For concatnating multiple visuals. 
     combined_plot = alt.vconcat() 
@@ -121,7 +276,9 @@ def plot_timeseries(df:pd.DataFrame, x:str, tickers:list, factor:str, measure:st
 
 
 # %%
+@cache_chart(columns=lambda a: ["ticker", a["factor"], a["measure"]])
 def plot_boxplot(df:pd.DataFrame, tickers:list, factor:str, measure:str, format_text:str=".1f"): 
+    import altair as alt 
 
     # For concatnating multiple visuals. 
     combined_plot = alt.vconcat() 
@@ -1,11 +1,14 @@
 # %%
 # Python modules. 
 import pandas as pd
-import yfinance as yf
+
+# Custom modules.
+from source.modules.numeric_kernels import rolling_mean_std, rolling_median
 
 # Custom configuration.
 from source.config.config import TICKER_DATE_COLLECT
 
+__all__ = ["GetTickerData", "GetImpVolatility"]
 
 
 # %%
@@ -19,7 +22,10 @@ class GetTickerData():
 		self.end_date = end_date
 
 		print("Creating yf Ticker instance for " + self.name + ", fetching history")
-		
+
+		# Imported on first use. Loading yfinance and its network stack is slow and 
+		# not needed when the processed data is read from the saved csv. 
+		import yfinance as yf 
 		self.ticker = yf.Ticker(self.name) 
 
 
@@ -73,7 +79,7 @@ class GetTickerData():
 		'''
 
 		# Compute the rolling median for volume over a specific window. 
-		df["volume_rollmed"] = df["volume"].rolling(window=90, min_periods=90, win_type=None).median() 
+		df["volume_rollmed"] = rolling_median(df["volume"], window=90) 
 
 		# Compute the difference between each volume with the 3 months rolling median volume. 
 		df["volume_diff_to_med"] = df["volume"] - df["volume_rollmed"] 
@@ -89,13 +95,9 @@ class GetTickerData():
 		'''Compute tscore to measure price change magnitude.'''
 
 		# Compute the t-score for price change. 
-		price_chg_c2o_rollavg = df["price_chg_c2o"].rolling(window=360, min_periods=360, win_type=None).mean() 
-		price_chg_o2c_rollavg = df["price_chg_o2c"].rolling(window=360, min_periods=360, win_type=None).mean() 
-		price_chg_c2c_rollavg = df["price_chg_c2c"].rolling(window=360, min_periods=360, win_type=None).mean() 
-
-		price_chg_c2o_rollstd = df["price_chg_c2o"].rolling(window=360, min_periods=360, win_type=None).std(ddof=1) 
-		price_chg_o2c_rollstd = df["price_chg_o2c"].rolling(window=360, min_periods=360, win_type=None).std(ddof=1) 
-		price_chg_c2c_rollstd = df["price_chg_c2c"].rolling(window=360, min_periods=360, win_type=None).std(ddof=1) 
+		price_chg_c2o_rollavg, price_chg_c2o_rollstd = rolling_mean_std(df["price_chg_c2o"], window=360, ddof=1) 
+		price_chg_o2c_rollavg, price_chg_o2c_rollstd = rolling_mean_std(df["price_chg_o2c"], window=360, ddof=1) 
+		price_chg_c2c_rollavg, price_chg_c2c_rollstd = rolling_mean_std(df["price_chg_c2c"], window=360, ddof=1) 
 
 		df["tscore_c2o"] = (df["price_chg_c2o"] - price_chg_c2o_rollavg) / price_chg_c2o_rollstd 
 		df["tscore_o2c"] = (df["price_chg_o2c"] - price_chg_o2c_rollavg) / price_chg_o2c_rollstd 
@@ -130,8 +132,8 @@ class GetImpVolatility(GetTickerData):
 
 	def compute_vix_chg_tscore(self, df:pd.DataFrame):
 		# Compute the t-score for VIX. 
-		vix_chg_c2c_rollavg = df["chg_c2c"].rolling(window=360, min_periods=360, win_type=None).mean() 
-		vix_chg_c2c_rollavg = df["chg_c2c"].rolling(window=360, min_periods=360, win_type=None).std(ddof=1) 
+		vix_chg_c2c_rollavg, vix_chg_c2c_rollstd = rolling_mean_std(df["chg_c2c"], window=360, ddof=1) 
+		vix_chg_c2c_rollavg = vix_chg_c2c_rollstd 
 		df["tscore_c2c"] = (df["chg_c2c"] - vix_chg_c2c_rollavg) / vix_chg_c2c_rollavg 
 		return df
 
@@ -0,0 +1,115 @@
+# %%
+# Python modules.
+import hashlib, threading
+from collections import OrderedDict
+from collections.abc import KeysView, ValuesView
+import numpy as np
+import pandas as pd
+
+__all__ = ["LRUCache", "hash_dataframe", "hash_array", "make_cache_key"]
+
+
+# %%
+class LRUCache():
+	'''Thread safe in-memory cache which evicts the least recently used entry once full.'''
+
+	def __init__(self, maxsize:int=128) -> None:
+		self.maxsize = maxsize
+		self.hits = 0
+		self.misses = 0
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+
+
+	def get(self, key, default=None):
+		'''Return the cached value and mark it as the most recently used.'''
+
+		with self._lock:
+			if key not in self._entries:
+				self.misses += 1
+				return default
+
+			self.hits += 1
+			self._entries.move_to_end(key)
+			return self._entries[key]
+
+
+	def put(self, key, value):
+		'''Store the value and evict the least recently used entries beyond the max size.'''
+
+		with self._lock:
+			self._entries[key] = value
+			self._entries.move_to_end(key)
+
+			while len(self._entries) > self.maxsize:
+				self._entries.popitem(last=False)
+
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+			self.hits, self.misses = 0, 0
+
+
+	def __contains__(self, key):
+		with self._lock:
+			return key in self._entries
+
+
+	def __len__(self):
+		return len(self._entries)
+
+
+
+# %%
+def hash_dataframe(df:pd.DataFrame) -> str:
+	'''Content hash of a dataframe. Covers the values, index, column names and dtypes.'''
+
+	digest = hashlib.sha1()
+	digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+	digest.update(repr(list(zip(df.columns, df.dtypes.astype(str)))).encode())
+	return digest.hexdigest()
+
+
+
+# %%
+def hash_array(values:np.ndarray) -> str:
+	'''Content hash of an array. Object arrays (e.g. strings) are hashed through pandas.'''
+
+	digest = hashlib.sha1()
+	digest.update(repr((values.dtype.str, values.shape)).encode())
+	if values.dtype == object:
+		digest.update(pd.util.hash_array(values.ravel()).tobytes())
+	else:
+		digest.update(np.ascontiguousarray(values).tobytes())
+	return digest.hexdigest()
+
+
+def make_cache_key(*args, **kwargs) -> str:
+	'''
+	Build a hashable key from call arguments. Dataframes and arrays are reduced to their content hash.
+	Raises TypeError for values which can't be keyed reliably.
+	'''
+
+	def normalise(value):
+		if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+			return value
+		if isinstance(value, np.generic):
+			return value.item()
+		if isinstance(value, (pd.DataFrame, pd.Series)):
+			return ("dataframe", hash_dataframe(value.to_frame() if isinstance(value, pd.Series) else value))
+		if isinstance(value, pd.Index):
+			return ("array", hash_array(value.to_numpy()))
+		if isinstance(value, np.ndarray):
+			return ("array", hash_array(value))
+		if isinstance(value, pd.api.extensions.ExtensionArray):
+			return ("array", hash_array(np.asarray(value, dtype=object)))
+		if isinstance(value, (list, tuple, KeysView, ValuesView)):
+			return tuple(normalise(v) for v in value)
+		if isinstance(value, (set, frozenset)):
+			return ("set", tuple(sorted((normalise(v) for v in value), key=repr)))
+		if isinstance(value, dict):
+			return ("dict", tuple(sorted(((k, normalise(v)) for k, v in value.items()), key=repr)))
+		raise TypeError(f"Can't build a cache key from a value of type ({type(value).__name__})")
+
+	return repr((normalise(args), tuple(sorted((k, normalise(v)) for k, v in kwargs.items()))))
@@ -6,6 +6,7 @@ import pandas as pd
 # Custom configuration.
 from source.config.config import DATASET_DIR
 
+__all__ = ["ManageDataset"]
 
 
 # %%
@@ -0,0 +1,251 @@
+# %%
+# Python modules.
+import numpy as np
+import pandas as pd
+
+# Custom configuration.
+from source.config.config import NUMERIC_BACKEND
+
+__all__ = ["rolling_mean_std", "rolling_median", "masked_group_means", "get_backend"]
+
+# Kernels for each backend. Built on first use so numba is only imported when needed.
+_kernels = {}
+
+
+
+# %%
+# Numpy backend. Matches pandas rolling(window, min_periods=window). A window which isn't
+# full or contains a missing value gives NaN.
+def _numpy_rolling_mean_std(values:np.ndarray, window:int, ddof:int=1):
+	mean = np.full(len(values), np.nan)
+	std = np.full(len(values), np.nan)
+	if len(values) < window:
+		return mean, std
+
+	# Shift by the overall mean before summing so the squares don't lose precision.
+	missing = np.isnan(values)
+	shift = np.nanmean(values) if not missing.all() else 0.0
+	shifted = np.where(missing, 0, values - shift)
+
+	# Window sums from the differences of the cumulative sums.
+	def window_sums(x):
+		cumsum = np.concatenate([[0], np.cumsum(x)])
+		return cumsum[window:] - cumsum[:-window]
+
+	n_missing = window_sums(missing.astype(np.int64))
+	sums, sq_sums = window_sums(shifted), window_sums(shifted ** 2)
+
+	mean[window - 1:] = np.where(n_missing == 0, sums / window + shift, np.nan)
+	if window > ddof:
+		var = np.maximum(sq_sums - sums ** 2 / window, 0) / (window - ddof)
+		std[window - 1:] = np.where(n_missing == 0, np.sqrt(var), np.nan)
+	return mean, std
+
+
+def _numpy_rolling_median(values:np.ndarray, window:int):
+	# A sorted window over numpy is slower than the skiplist pandas uses, so keep pandas here.
+	return pd.Series(values).rolling(window=window, min_periods=window).median().to_numpy()
+
+
+def _numpy_masked_group_means(values:np.ndarray, groups:np.ndarray, n_groups:int, flags:np.ndarray, period:int):
+	'''Mean of the values per (group, flag column) over the rows where the flag equals the period.'''
+
+	valid = ~np.isnan(values)
+	values = np.where(valid, values, 0)
+
+	sums = np.zeros((n_groups, flags.shape[1]))
+	counts = np.zeros((n_groups, flags.shape[1]))
+
+	# One matrix product per group keeps the memory at the size of the flags.
+	order = np.argsort(groups, kind="stable")
+	bounds = np.searchsorted(groups[order], np.arange(n_groups + 1))
+	for g in range(n_groups):
+		rows = order[bounds[g]:bounds[g + 1]]
+		mask = (flags[rows] == period) & valid[rows, None]
+		sums[g] = values[rows] @ mask
+		counts[g] = mask.sum(axis=0)
+
+	with np.errstate(invalid="ignore", divide="ignore"):
+		return np.where(counts > 0, sums / counts, np.nan)
+
+
+
+# %%
+def _build_numba_kernels():
+	import numba
+
+	@numba.njit(cache=True)
+	def rolling_mean_std(values, window, ddof=1):
+		n = len(values)
+		mean = np.full(n, np.nan)
+		std = np.full(n, np.nan)
+
+		# Shift by the overall mean before summing so the squares don't lose precision.
+		shift, n_valid = 0.0, 0
+		for i in range(n):
+			if not np.isnan(values[i]):
+				shift += values[i]
+				n_valid += 1
+		shift = shift / n_valid if n_valid > 0 else 0.0
+
+		# Running sums over the window. Missing values are counted instead of summed.
+		total, sq_total, n_missing = 0.0, 0.0, 0
+		for i in range(n):
+			x = values[i] - shift
+			if np.isnan(x):
+				n_missing += 1
+			else:
+				total += x
+				sq_total += x * x
+
+			if i >= window:
+				x = values[i - window] - shift
+				if np.isnan(x):
+					n_missing -= 1
+				else:
+					total -= x
+					sq_total -= x * x
+
+			if i >= window - 1 and n_missing == 0:
+				mean[i] = total / window + shift
+				# Like pandas, no standard deviation unless the window is larger than ddof.
+				if window > ddof:
+					std[i] = np.sqrt(max(sq_total - total * total / window, 0.0) / (window - ddof))
+
+		return mean, std
+
+	@numba.njit(cache=True)
+	def rolling_median(values, window):
+		n = len(values)
+		median = np.full(n, np.nan)
+
+		# The values within the window kept in sorted order. Missing values are only counted.
+		ordered = np.empty(window)
+		size, n_missing = 0, 0
+
+		for i in range(n):
+			# Drop the value leaving the window before adding the new one.
+			if i >= window:
+				x = values[i - window]
+				if np.isnan(x):
+					n_missing -= 1
+				else:
+					# Binary search for the position of the value.
+					lo, hi = 0, size - 1
+					while lo < hi:
+						mid = (lo + hi) // 2
+						if ordered[mid] < x:
+							lo = mid + 1
+						else:
+							hi = mid
+					for j in range(lo, size - 1):
+						ordered[j] = ordered[j + 1]
+					size -= 1
+
+			# Insertion step of an insertion sort.
+			x = values[i]
+			if np.isnan(x):
+				n_missing += 1
+			else:
+				j = size
+				while j > 0 and ordered[j - 1] > x:
+					ordered[j] = ordered[j - 1]
+					j -= 1
+				ordered[j] = x
+				size += 1
+
+			if i >= window - 1 and n_missing == 0:
+				half = window // 2
+				median[i] = ordered[half] if window % 2 == 1 else (ordered[half - 1] + ordered[half]) / 2
+
+		return median
+
+	@numba.njit(cache=True)
+	def masked_group_means(values, groups, n_groups, flags, period):
+		n_flags = flags.shape[1]
+		sums = np.zeros((n_groups, n_flags))
+		counts = np.zeros((n_groups, n_flags))
+
+		for r in range(len(values)):
+			if np.isnan(values[r]):
+				continue
+			g = groups[r]
+			for f in range(n_flags):
+				if flags[r, f] == period:
+					sums[g, f] += values[r]
+					counts[g, f] += 1
+
+		means = np.full((n_groups, n_flags), np.nan)
+		for g in range(n_groups):
+			for f in range(n_flags):
+				if counts[g, f] > 0:
+					means[g, f] = sums[g, f] / counts[g, f]
+
+		return means
+
+	return {
+		"rolling_mean_std": rolling_mean_std,
+		"rolling_median": rolling_median,
+		"masked_group_means": masked_group_means,
+	}
+
+
+
+# %%
+def get_backend(backend:str=NUMERIC_BACKEND) -> str:
+	'''Resolve (auto) to numba if it's installed, otherwise numpy.'''
+
+	if backend == "auto":
+		try:
+			import numba
+			return "numba"
+		except ImportError:
+			return "numpy"
+
+	if backend not in ["numba", "numpy"]:
+		raise ValueError(f"Unknown numeric backend ({backend}). Choose from: auto, numba, numpy")
+	return backend
+
+
+def get_kernels(backend:str=NUMERIC_BACKEND) -> dict:
+	backend = get_backend(backend)
+
+	if backend not in _kernels:
+		if backend == "numba":
+			_kernels[backend] = _build_numba_kernels()
+		else:
+			_kernels[backend] = {
+				"rolling_mean_std": _numpy_rolling_mean_std,
+				"rolling_median": _numpy_rolling_median,
+				"masked_group_means": _numpy_masked_group_means,
+			}
+
+	return _kernels[backend]
+
+
+
+# %%
+def rolling_mean_std(values, window:int, ddof:int=1, backend:str=NUMERIC_BACKEND):
+	'''Rolling mean and standard deviation. Same as pandas rolling(window, min_periods=window).'''
+
+	values = np.ascontiguousarray(values, dtype=np.float64)
+	return get_kernels(backend)["rolling_mean_std"](values, window, ddof)
+
+
+def rolling_median(values, window:int, backend:str=NUMERIC_BACKEND):
+	'''Rolling median. Same as pandas rolling(window, min_periods=window).median().'''
+
+	values = np.ascontiguousarray(values, dtype=np.float64)
+	return get_kernels(backend)["rolling_median"](values, window)
+
+
+def masked_group_means(values, groups, n_groups:int, flags, period:int, backend:str=NUMERIC_BACKEND):
+	'''
+	(group x flag column) matrix with the mean of the values over the rows where the flag
+	equals the period. Missing values are skipped. NaN if there is no row to average.
+	'''
+
+	values = np.ascontiguousarray(values, dtype=np.float64)
+	groups = np.ascontiguousarray(groups, dtype=np.int64)
+	flags = np.ascontiguousarray(flags)
+	return get_kernels(backend)["masked_group_means"](values, groups, n_groups, flags, period)
@@ -1,57 +1,190 @@
 # %%
 # Python modules. 
+import io, os, re, json, hashlib 
 import pandas as pd 
 
 # Custom modules. 
-from source.modules.manage_dataset import * 
-from source.modules.process_tickerdata import *
+from source.modules.manage_dataset import ManageDataset 
 
 # Custom configuration.
-from source.config.config import NEWS_KEYWORDS_MAPPING
+from source.config.config import NEWS_KEYWORDS_MAPPING, DATASET_DIR
 
+__all__ = ["ProcessNewsData"]
 
 
 # %%
 class ProcessNewsData(ManageDataset):	
-	def __init__(self, use_csv:bool=False, filename:str="news_headline_keywords.csv") -> None:
+	'''
+	ManageDataset holding the dates of the headlines matching each news topic, one column per topic. 
+	In incremental mode only the headlines appended to the archive since the last run are scanned for 
+	the existing topics. New or edited topics in NEWS_KEYWORDS_MAPPING are scanned over the full archive. 
+	The archive is assumed to be append only. If the part processed before was changed, every topic is 
+	scanned over the full archive again. 
+	'''
+
+	def __init__(
+		self, 
+		use_csv:bool=False, 
+		filename:str="news_headline_keywords.csv", 
+		articles_filename:str="raw_partner_headlines.csv", 
+		incremental:bool=False, 
+		state_filename:str="news_headline_keywords_state.json", 
+		dataset_dir:str=DATASET_DIR, 
+	) -> None:
 		
+		self.dataset_dir = dataset_dir 
 		self.topic_keywords = NEWS_KEYWORDS_MAPPING
 		self.topics = list(self.topic_keywords.keys())
+		self.articles_filename = articles_filename 
+		self.incremental = incremental 
+		self.state_filename = state_filename 
+
+		# The processed part of the archive and the dates per topic. Saved along with the csv. 
+		self.archive = None 
+		self.state = None 
 
 		if use_csv == False:
-			self.articles = ManageDataset("raw_partner_headlines.csv").df
 			print("Transferring to EventsDate Format")
-			self.df = self.get_event_dates()
+			self.df = self.get_event_dates_incremental() if incremental else self.get_event_dates()
+
+		ManageDataset.__init__(self, filename, use_csv, dataset_dir)
+
 
-		ManageDataset.__init__(self, filename, use_csv)
+	def write_to_csv(self):
+		ManageDataset.write_to_csv(self) 
+
+		# Only save the state once the csv is written. 
+		if self.state is not None: 
+			self.write_state() 
 
 
 	def get_event_dates(self):
-		matching_headlines = {
-			topic: self.get_dates(self.topic_keywords[topic], self.articles) for topic in self.topics 
-		}
+		articles, _ = self.read_articles({}, full=True) 
+		topic_dates = self.get_topic_dates(self.topics, articles) 
+		self.state = self.make_state(topic_dates) 
+		return self.to_event_dates_frame(topic_dates) 
+
+
+	def get_event_dates_incremental(self):
+		previous_state = self.read_state() 
+		previous_topics = previous_state.get("topics", {}) 
+
+		# Topics which are new or whose keywords changed have to be scanned over the full archive. 
+		rescan_topics = [t for t in self.topics if previous_topics.get(t, {}).get("keywords") != self.topic_keywords[t]] 
+		articles, new_articles = self.read_articles(previous_state, full=len(rescan_topics) > 0) 
+
+		# The processed part of the archive changed, so the previous dates can't be reused. 
+		if new_articles is None: 
+			print(f"({self.articles_filename}) changed since the last run") 
+			rescan_topics, new_articles = self.topics, articles.iloc[:0] 
+
+		current_topics = [t for t in self.topics if t not in rescan_topics] 
+
+		print(f"Scanning all headlines for ({', '.join(rescan_topics) or 'no topics'})") 
+		topic_dates = self.get_topic_dates(rescan_topics, articles) 
+
+		print(f"Scanning {len(new_articles)} new headlines for ({', '.join(current_topics) or 'no topics'})") 
+		new_topic_dates = self.get_topic_dates(current_topics, new_articles) 
+
+		for topic in current_topics: 
+			topic_dates[topic] = set(previous_topics[topic]["dates"]) | new_topic_dates[topic] 
+
+		self.state = self.make_state(topic_dates) 
+		return self.to_event_dates_frame(topic_dates) 
+
+
+	def read_articles(self, previous_state:dict, full:bool=False): 
+		'''
+		Read the headlines as (all headlines, headlines appended since the previous state). Only the 
+		appended bytes are parsed unless (full). No appended headlines if the processed part changed. 
+		'''
+
+		print(f"Read from ({self.articles_filename})") 
+
+		self.get_ready_for_file_operation() 
+		offset = previous_state.get("offset") 
+		with open(os.path.join(self.dataset_dir, self.articles_filename), "rb") as f: 
+			header = f.readline() 
+			f.seek(0) 
+			processed = f.read(offset) if offset is not None else b"" 
+			appended = f.read() 
+
+		# Compare the processed part against its digest, then extend the digest to the whole file. 
+		digest = hashlib.sha1(processed) 
+		unchanged = offset is not None and len(processed) == offset and digest.hexdigest() == previous_state.get("digest") 
+		digest.update(appended) 
+		self.archive = {"offset": len(processed) + len(appended), "digest": digest.hexdigest()} 
+
+		if not unchanged: 
+			return self.parse_articles(processed + appended), None 
 
-		df_headline_keywords = pd.concat(
-			list(matching_headlines.values()),
-			keys=list(matching_headlines.keys()),
-			axis=1
-		)
-		return df_headline_keywords
+		# The header is needed to parse the appended rows on their own. 
+		articles = self.parse_articles(processed + appended) if full else None 
+		return articles, self.parse_articles(header + appended) 
 
 
-	def get_dates(self, keywords:dict, df:pd.DataFrame):
-		match_indicator = self.get_key_word_match_indicator(keywords, df)
-		matches = match_indicator[match_indicator == True]
-		dates = pd.concat([matches, df["date"]], axis=1, join="inner")["date"].str[:-9]
-		return dates
+	def parse_articles(self, data:bytes): 
+		return pd.read_csv(io.BytesIO(data), usecols=["headline", "date"]) 
+
+
+	def get_topic_dates(self, topics:list, df:pd.DataFrame): 
+		'''The set of dates with a headline matching the keywords, for each topic.'''
+
+		if not topics or df.empty: 
+			return {topic: set() for topic in topics} 
+
+		# Drop the time. Example (2020-06-05 10:30:00) to (2020-06-05). 
+		dates = df["date"].str[:-9] 
+
+		topic_dates = {} 
+		for topic in topics: 
+			match_indicator = self.get_key_word_match_indicator(self.topic_keywords[topic], df) 
+			topic_dates[topic] = set(dates[match_indicator].dropna().unique()) 
+
+		return topic_dates 
 
 
 	def get_key_word_match_indicator(self, keywords:dict, df:pd.DataFrame):
 		# Combine the keywords into a regex pattern.
-		re_pattern = f"""({"|".join(keywords)})"""
-
-		# Extract matches. 
-		matches = df.loc[:, "headline"].str.findall(re_pattern, flags=re.IGNORECASE) 
+		re_pattern = f"""(?:{"|".join(keywords)})"""
 
-		match_indicator = matches.str.len() > 0
+		# Flag the headlines containing any of the keywords. 
+		match_indicator = df.loc[:, "headline"].str.contains(re_pattern, flags=re.IGNORECASE, regex=True, na=False) 
 		return match_indicator
+
+
+	def to_event_dates_frame(self, topic_dates:dict): 
+		'''One column per topic with its sorted dates. Shorter columns are padded with NaN.'''
+
+		return pd.DataFrame({topic: pd.Series(sorted(topic_dates[topic]), dtype=object) for topic in self.topics}) 
+
+
+	def make_state(self, topic_dates:dict): 
+		return { 
+			**self.archive, 
+			"topics": { 
+				topic: {"keywords": list(self.topic_keywords[topic]), "dates": sorted(topic_dates[topic])} 
+				for topic in self.topics 
+			}, 
+		} 
+
+
+	def read_state(self): 
+		'''Load the state from the previous run. Empty if there isn't any.'''
+
+		self.get_ready_for_file_operation() 
+		filepath = os.path.join(self.dataset_dir, self.state_filename) 
+		if not os.path.exists(filepath): 
+			return {} 
+
+		print(f"Read from ({self.state_filename})") 
+		with open(filepath) as f: 
+			return json.load(f) 
+
+
+	def write_state(self): 
+		print(f"Write to ({self.state_filename})") 
+
+		self.get_ready_for_file_operation() 
+		with open(os.path.join(self.dataset_dir, self.state_filename), "w") as f: 
+			json.dump(self.state, f) 
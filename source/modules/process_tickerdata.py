@@ -3,12 +3,13 @@
 import pandas as pd 
 
 # Custom modules. 
-from source.modules.get_tickerdata import * 
-from source.modules.manage_dataset import * 
+from source.modules.get_tickerdata import GetTickerData, GetImpVolatility 
+from source.modules.manage_dataset import ManageDataset 
 
 # Custom configuration.
-from source.config.config import TICKER_TO_COLLECT
+from source.config.config import TICKER_TO_COLLECT, TICKER_DATE_COLLECT
 
+__all__ = ["ProcessTickerData", "ProcessImpVolatility"]
 
 
 # %%
@@ -25,8 +26,12 @@ class ProcessTickerData(ManageDataset):
 		end_date:str=TICKER_DATE_COLLECT[1], 
 		use_csv:bool=False, 
 		filename:str="sector_price_history_processed_stg_1.csv", 
+		df_vix:pd.DataFrame=None, 
 	) -> None:
 
+		# Processed VIX history. Fetched from Yahoo Finance if not provided. 
+		self.df_vix = df_vix 
+
 		# The primary dataframe for analysis. 
 		if use_csv == False:
 			print("Pulling Ticker data from Yahoo Finance")
@@ -53,5 +58,23 @@ class ProcessTickerData(ManageDataset):
 		df.columns = [c.lower() for c in df.columns] 
 		
 		# Join with an history from Implied Volatility Index ticker. 
-		df_with_vix = df.merge(right=GetImpVolatility().get_processed(), how="left", left_on="date", right_on="date", validate="many_to_one") 
+		df_vix = GetImpVolatility().get_processed() if self.df_vix is None else self.df_vix 
+		df_with_vix = df.merge(right=df_vix, how="left", left_on="date", right_on="date", validate="many_to_one") 
 		return df_with_vix 
+
+
+
+# %%
+class ProcessImpVolatility(ManageDataset): 
+	'''A DataSet holding the processed Implied Volatility Index history, to be joined with the ticker data.'''
+
+	def __init__(self, use_csv:bool=False, filename:str="vix_history_processed.csv") -> None:
+
+		if use_csv == False:
+			print("Pulling VIX data from Yahoo Finance")
+			self.df = GetImpVolatility().get_processed().reset_index(drop=False) 
+
+		ManageDataset.__init__(self, filename, use_csv) 
+
+		# Dates are read back as str. Convert them to match the ticker history when joining. 
+		self.df["date"] = pd.to_datetime(self.df["date"]) 
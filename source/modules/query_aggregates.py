@@ -0,0 +1,317 @@
+# %%
+# Python modules.
+import sys, json, argparse, threading
+import urllib.parse, urllib.request, urllib.error
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import numpy as np
+import pandas as pd
+
+# Custom modules.
+from source.modules.manage_dataset import ManageDataset
+from source.modules.manage_cache import LRUCache, make_cache_key
+
+# Custom configuration.
+from source.config.config import (
+	QUERY_SERVICE_HOST, QUERY_SERVICE_PORT, QUERY_CACHE_SIZE, QUERY_MAX_CONCURRENCY
+)
+
+__all__ = ["AggregateQueryService", "AggregateQueryServer", "AggregateQueryClient", "main"]
+
+
+
+# %%
+class AggregateQueryService():
+	'''
+	Holds the aggregates (stage 3) in memory, indexed by ticker and factor, and answers filter,
+	threshold and top k queries. Results are cached and the number of concurrent queries is bounded.
+	'''
+
+	def __init__(
+		self,
+		df_aggregates:pd.DataFrame=None,
+		filename:str="sector_price_history_processed_stg_3.csv",
+		cache_size:int=QUERY_CACHE_SIZE,
+		max_concurrency:int=QUERY_MAX_CONCURRENCY,
+	) -> None:
+
+		# Load the aggregates once. Use the provided dataframe or read the saved csv.
+		self.df = ManageDataset(filename).df if df_aggregates is None else df_aggregates
+		self.df = self.df.reset_index(drop=True)
+		self.metrics = [c for c in self.df.columns if c not in ["ticker", "factor"]]
+
+		# Row positions for each ticker and each factor.
+		self.ticker_rows = self.df.groupby("ticker", sort=True).indices
+		self.factor_rows = self.df.groupby("factor", sort=False).indices
+
+		self.cache = LRUCache(maxsize=cache_size)
+		self.semaphore = threading.BoundedSemaphore(max_concurrency)
+
+
+	def filter(self, tickers:list=None, factors:list=None, metrics:list=None):
+		'''Rows for the tickers and factors. All of them if not specified.'''
+
+		return self.run_query("filter", tickers=tickers, factors=factors, metrics=metrics)
+
+
+	def threshold(self, metric:str, lower:float=None, upper:float=None, tickers:list=None, factors:list=None):
+		'''Rows where (lower <= metric <= upper). Either bound can be left out.'''
+
+		return self.run_query("threshold", metric=metric, lower=lower, upper=upper, tickers=tickers, factors=factors)
+
+
+	def top_k(self, metric:str, k:int=10, ascending:bool=False, tickers:list=None, factors:list=None):
+		'''The (k) rows with the highest metric value, or the lowest if ascending.'''
+
+		return self.run_query("top_k", metric=metric, k=int(k), ascending=bool(ascending), tickers=tickers, factors=factors)
+
+
+	def metadata(self):
+		return {
+			"tickers": list(self.ticker_rows),
+			"factors": list(self.factor_rows),
+			"metrics": self.metrics,
+			"rows": len(self.df),
+		}
+
+
+	def stats(self):
+		return {"cached": len(self.cache), "hits": self.cache.hits, "misses": self.cache.misses}
+
+
+	def run_query(self, query:str, **params):
+		'''Serve the query from the cache, otherwise compute it while holding a concurrency slot.'''
+
+		# Ignore the order of the tickers, factors and metrics so equivalent queries share an entry.
+		for key in ["tickers", "factors", "metrics"]:
+			if key in params:
+				params[key] = self.normalise_values(params[key])
+
+		cache_key = make_cache_key(query, **params)
+		df_result = self.cache.get(cache_key)
+
+		if df_result is None:
+			with self.semaphore:
+				df_result = getattr(self, f"compute_{query}")(**params)
+			self.cache.put(cache_key, df_result)
+
+		# Return a copy so the caller can't modify the cached result.
+		return df_result.copy()
+
+
+	def normalise_values(self, values):
+		if values is None:
+			return None
+		if isinstance(values, str):
+			values = [values]
+		return sorted(set(values))
+
+
+	def select_rows(self, tickers:list=None, factors:list=None):
+		'''Row positions matching both the tickers and the factors.'''
+
+		rows = None
+		for values, index in [(tickers, self.ticker_rows), (factors, self.factor_rows)]:
+			if values is None:
+				continue
+			positions = np.concatenate([index.get(v, np.array([], dtype=np.int64)) for v in values] + [np.array([], dtype=np.int64)])
+			rows = positions if rows is None else np.intersect1d(rows, positions)
+
+		return np.arange(len(self.df)) if rows is None else np.sort(rows)
+
+
+	def validate_metrics(self, metrics:list):
+		unknown = [m for m in metrics if m not in self.metrics]
+		if unknown:
+			raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+
+
+	def compute_filter(self, tickers:list=None, factors:list=None, metrics:list=None):
+		metrics = self.metrics if metrics is None else metrics
+		self.validate_metrics(metrics)
+
+		rows = self.select_rows(tickers, factors)
+		return self.df.iloc[rows][["ticker", "factor"] + metrics].reset_index(drop=True)
+
+
+	def compute_threshold(self, metric:str, lower:float=None, upper:float=None, tickers:list=None, factors:list=None):
+		self.validate_metrics([metric])
+
+		df_fil = self.compute_filter(tickers, factors, [metric])
+		boo_within = df_fil[metric].notnull()
+		if lower is not None:
+			boo_within &= df_fil[metric] >= lower
+		if upper is not None:
+			boo_within &= df_fil[metric] <= upper
+
+		return df_fil.loc[boo_within, :].reset_index(drop=True)
+
+
+	def compute_top_k(self, metric:str, k:int=10, ascending:bool=False, tickers:list=None, factors:list=None):
+		self.validate_metrics([metric])
+
+		df_fil = self.compute_filter(tickers, factors, [metric])
+		df_fil = df_fil.nsmallest(k, metric) if ascending else df_fil.nlargest(k, metric)
+		return df_fil.reset_index(drop=True)
+
+
+
+# %%
+class AggregateQueryRequestHandler(BaseHTTPRequestHandler):
+	'''
+	Maps GET requests onto the service. List parameters are repeated, e.g.
+	(/filter?ticker=XLF&ticker=XLK&metric=tscore_c2c_mag_1) or (/top_k?metric=tscore_c2c_mag_1&k=5).
+	'''
+
+	QUERIES = ["filter", "threshold", "top_k"]
+	LIST_PARAMS = {"ticker": "tickers", "factor": "factors", "metric": "metrics"}
+
+
+	def do_GET(self):
+		url = urllib.parse.urlparse(self.path)
+		path = url.path.strip("/")
+		service = self.server.service
+
+		try:
+			if path == "metadata":
+				return self.send_json(200, service.metadata())
+			if path == "stats":
+				return self.send_json(200, service.stats())
+			if path not in self.QUERIES:
+				return self.send_json(404, {"error": f"Unknown query ({path}). Choose from: {', '.join(self.QUERIES)}"})
+
+			df_result = getattr(service, path)(**self.parse_params(path, url.query))
+			self.send_json(200, json.loads(df_result.to_json(orient="split", index=False)))
+
+		except (ValueError, TypeError) as e:
+			self.send_json(400, {"error": str(e)})
+
+
+	def parse_params(self, path:str, query:str):
+		params = {}
+		for key, values in urllib.parse.parse_qs(query).items():
+			if key in self.LIST_PARAMS and not (key == "metric" and path != "filter"):
+				params[self.LIST_PARAMS[key]] = values
+			elif key in ["lower", "upper"]:
+				params[key] = float(values[0])
+			elif key == "k":
+				params[key] = int(values[0])
+			elif key == "ascending":
+				params[key] = values[0].lower() in ["1", "true", "yes"]
+			else:
+				params[key] = values[0]
+
+		return params
+
+
+	def send_json(self, status:int, content:dict):
+		body = json.dumps(content).encode()
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+
+	def log_message(self, format, *args):
+		# Keep the console quiet. Only the requests which fail are printed.
+		if not str(args[1]).startswith("2"):
+			BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+
+# %%
+class AggregateQueryServer(ThreadingHTTPServer):
+	'''HTTP server sharing one warm AggregateQueryService between all the clients.'''
+
+	daemon_threads = True
+
+	def __init__(self, service:AggregateQueryService, host:str=QUERY_SERVICE_HOST, port:int=QUERY_SERVICE_PORT) -> None:
+		self.service = service
+		ThreadingHTTPServer.__init__(self, (host, port), AggregateQueryRequestHandler)
+
+
+	def start_in_background(self):
+		'''Serve from a daemon thread. Useful for running the server inside a notebook.'''
+
+		thread = threading.Thread(target=self.serve_forever, daemon=True)
+		thread.start()
+		return thread
+
+
+
+# %%
+class AggregateQueryClient():
+	'''Queries a running AggregateQueryServer. Returns the results as dataframes.'''
+
+	def __init__(self, host:str=QUERY_SERVICE_HOST, port:int=QUERY_SERVICE_PORT, timeout:float=30) -> None:
+		self.base_url = f"http://{host}:{port}"
+		self.timeout = timeout
+
+
+	def filter(self, tickers:list=None, factors:list=None, metrics:list=None):
+		return self.get_dataframe("filter", ticker=tickers, factor=factors, metric=metrics)
+
+
+	def threshold(self, metric:str, lower:float=None, upper:float=None, tickers:list=None, factors:list=None):
+		return self.get_dataframe("threshold", metric=metric, lower=lower, upper=upper, ticker=tickers, factor=factors)
+
+
+	def top_k(self, metric:str, k:int=10, ascending:bool=False, tickers:list=None, factors:list=None):
+		return self.get_dataframe("top_k", metric=metric, k=k, ascending=ascending, ticker=tickers, factor=factors)
+
+
+	def metadata(self):
+		return self.get("metadata")
+
+
+	def stats(self):
+		return self.get("stats")
+
+
+	def get_dataframe(self, path:str, **params):
+		content = self.get(path, **params)
+		return pd.DataFrame(content["data"], columns=content["columns"])
+
+
+	def get(self, path:str, **params):
+		# Lists are sent as repeated parameters. Parameters left as None are dropped.
+		params = {
+			k: [str(i) for i in v] if isinstance(v, (list, tuple, set)) else str(v)
+			for k, v in params.items() if v is not None
+		}
+		url = f"{self.base_url}/{path}?{urllib.parse.urlencode(params, doseq=True)}"
+
+		try:
+			with urllib.request.urlopen(url, timeout=self.timeout) as response:
+				return json.loads(response.read())
+		except urllib.error.HTTPError as e:
+			raise ValueError(json.loads(e.read()).get("error", str(e))) from None
+
+
+
+# %%
+def main(argv:list=None):
+	parser = argparse.ArgumentParser(description="Serve queries over the aggregates (stage 3). Run from the main project directory.")
+	parser.add_argument("--host", default=QUERY_SERVICE_HOST)
+	parser.add_argument("--port", type=int, default=QUERY_SERVICE_PORT)
+	parser.add_argument("--filename", default="sector_price_history_processed_stg_3.csv", help="Aggregates csv within the dataset directory.")
+	parser.add_argument("--cache-size", type=int, default=QUERY_CACHE_SIZE, help="Number of query results to cache.")
+	parser.add_argument("--max-concurrency", type=int, default=QUERY_MAX_CONCURRENCY, help="Maximum number of queries computed at the same time.")
+	args = parser.parse_args(argv)
+
+	service = AggregateQueryService(filename=args.filename, cache_size=args.cache_size, max_concurrency=args.max_concurrency)
+	server = AggregateQueryServer(service, args.host, args.port)
+
+	print(f"Serving {len(service.df)} aggregates on http://{args.host}:{args.port}")
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,226 @@
+# %%
+# Python modules.
+import os, sys, argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# Custom configuration.
+from source.config import config
+from source.config.config import DATASET_DIR, EVENTS_FILENAMES
+
+__all__ = ["PipelineRunner", "STAGES", "main"]
+
+
+# %%
+# Stage functions. Each one runs in a worker process and communicates with the
+# other stages only through the files in the dataset directory.
+def run_vix():
+	from source.modules.process_tickerdata import ProcessImpVolatility
+	ProcessImpVolatility(use_csv=False).write_to_csv()
+
+
+def run_tickers():
+	from source.modules.process_tickerdata import ProcessTickerData, ProcessImpVolatility
+	ProcessTickerData(use_csv=False, df_vix=ProcessImpVolatility(use_csv=True).df).write_to_csv()
+
+
+def run_news():
+	from source.modules.process_newsdata import ProcessNewsData
+	ProcessNewsData(use_csv=False, incremental=True).write_to_csv()
+
+
+def run_events():
+	from source.modules.consolidate_eventdates import GetEventDates
+	GetEventDates(use_index=False)
+
+
+def run_consolidation():
+	from source.modules.consolidate_eventdates import ConsolidateDates
+	ConsolidateDates(use_csv=False).write_to_csv()
+
+
+def run_aggregation():
+	from source.modules.consolidate_eventdates import ConsolidateDates
+	from source.modules.compute_aggregations import AggregateMeasures
+	AggregateMeasures(use_csv=False, ticker_event_dates=ConsolidateDates(use_csv=True)).write_to_csv()
+
+
+def run_comovement():
+	from source.modules.compute_comovement import ComputeCoMovement
+	ComputeCoMovement(use_csv=False).write_to_csv()
+
+
+def run_convergence():
+	from source.modules.compute_aggregations import IdentifyConvergence
+	IdentifyConvergence(use_csv=False).write_to_csv()
+
+
+
+# %%
+# The pipeline as a dependency graph. Inputs and outputs are filenames within the dataset directory.
+# A stage is current if all its outputs are newer than its inputs, its dependencies' outputs and the config.
+STAGES = {
+	"vix": {
+		"func": run_vix, "deps": [], "inputs": [],
+		"outputs": ["vix_history_processed.csv"],
+	},
+	"tickers": {
+		"func": run_tickers, "deps": ["vix"], "inputs": [],
+		"outputs": ["sector_price_history_processed_stg_1.csv"],
+	},
+	"news": {
+		"func": run_news, "deps": [], "inputs": ["raw_partner_headlines.csv"],
+		"outputs": ["news_headline_keywords.csv"],
+	},
+	"events": {
+		"func": run_events, "deps": ["news"], "inputs": [f for f in EVENTS_FILENAMES if f != "news_headline_keywords.csv"],
+		"outputs": ["event_dates_index.npz"],
+	},
+	"consolidation": {
+		"func": run_consolidation, "deps": ["tickers", "events"], "inputs": [],
+		"outputs": ["sector_price_history_processed_stg_2.csv"],
+	},
+	"aggregation": {
+		"func": run_aggregation, "deps": ["consolidation"], "inputs": [],
+		"outputs": ["sector_price_history_processed_stg_3.csv"],
+	},
+	"convergence": {
+		"func": run_convergence, "deps": ["aggregation"], "inputs": [],
+		"outputs": ["sector_convergence.csv"],
+	},
+	"comovement": {
+		"func": run_comovement, "deps": ["consolidation"], "inputs": [],
+		"outputs": ["sector_event_comovement.csv"],
+	},
+}
+
+
+
+# %%
+class PipelineRunner():
+	'''Runs the pipeline stages in dependency order, running independent stages concurrently.'''
+
+	def __init__(self, stages:dict=STAGES, dataset_dir:str=DATASET_DIR, max_workers:int=None, force:bool=False) -> None:
+		self.stages = stages
+		self.dataset_dir = dataset_dir
+		self.max_workers = max_workers
+		self.force = force
+
+
+	def resolve_target(self, target:str):
+		'''Map a stage name or an output filename to the stage name.'''
+
+		if target in self.stages:
+			return target
+
+		for name, stage in self.stages.items():
+			if target in stage["outputs"]:
+				return name
+
+		raise ValueError(f"Unknown stage or output ({target}). Choose from: {', '.join(self.stages)}")
+
+
+	def get_required_stages(self, targets:list=None):
+		'''The targets and all their upstream stages. Every stage if no target is given.'''
+
+		if not targets:
+			return list(self.stages)
+
+		required, pending = set(), [self.resolve_target(t) for t in targets]
+		while pending:
+			name = pending.pop()
+			if name not in required:
+				required.add(name)
+				pending.extend(self.stages[name]["deps"])
+
+		# Keep the order the stages are declared in.
+		return [name for name in self.stages if name in required]
+
+
+	def is_current(self, name:str):
+		'''A stage is current if its outputs exist and are newer than everything it depends on.'''
+
+		stage = self.stages[name]
+		outputs = [os.path.join(self.dataset_dir, f) for f in stage["outputs"]]
+		if not all(os.path.exists(f) for f in outputs):
+			return False
+
+		inputs = [os.path.join(self.dataset_dir, f) for f in stage["inputs"]]
+		inputs += [os.path.join(self.dataset_dir, f) for dep in stage["deps"] for f in self.stages[dep]["outputs"]]
+		inputs += [config.__file__]
+
+		input_mtimes = [os.path.getmtime(f) for f in inputs if os.path.exists(f)]
+		return min(os.path.getmtime(f) for f in outputs) >= max(input_mtimes, default=0)
+
+
+	def run(self, targets:list=None, dry_run:bool=False):
+		'''Run the required stages. Returns the stage names which failed.'''
+
+		required = self.get_required_stages(targets)
+		done, failed, rebuilt, running = set(), set(), set(), {}
+
+		with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+			while len(done) + len(failed) < len(required):
+				# Skip the stages downstream of a failure.
+				for name in required:
+					if name not in done | failed and any(dep in failed for dep in self.stages[name]["deps"]):
+						print(f"[{name}] Skipped, upstream stage failed")
+						failed.add(name)
+
+				# Start every stage whose dependencies are done. Current stages complete immediately.
+				for name in required:
+					if name in done | failed or name in running.values():
+						continue
+					if not all(dep in done for dep in self.stages[name]["deps"] if dep in required):
+						continue
+
+					stale = self.force or any(dep in rebuilt for dep in self.stages[name]["deps"]) or not self.is_current(name)
+					if not stale:
+						print(f"[{name}] Up to date")
+						done.add(name)
+					elif dry_run:
+						print(f"[{name}] Would run")
+						done.add(name)
+						rebuilt.add(name)
+					else:
+						print(f"[{name}] Running")
+						running[executor.submit(self.stages[name]["func"])] = name
+
+				if not running:
+					continue
+
+				finished, _ = wait(running, return_when=FIRST_COMPLETED)
+				for future in finished:
+					name = running.pop(future)
+					try:
+						future.result()
+						print(f"[{name}] Done")
+						done.add(name)
+						rebuilt.add(name)
+					except Exception as e:
+						print(f"[{name}] Failed: {e!r}")
+						failed.add(name)
+
+		return [name for name in required if name in failed]
+
+
+
+# %%
+def main(argv:list=None):
+	parser = argparse.ArgumentParser(description="Run the data processing pipeline.")
+	parser.add_argument("targets", nargs="*", help=f"Stage names or output filenames to build. Defaults to all stages: {', '.join(STAGES)}.")
+	parser.add_argument("--force", action="store_true", help="Rerun the stages even if their outputs are current.")
+	parser.add_argument("--workers", type=int, default=None, help="Maximum number of stages to run concurrently.")
+	parser.add_argument("--dry-run", action="store_true", help="Only print the stages which would run.")
+	args = parser.parse_args(argv)
+
+	runner = PipelineRunner(max_workers=args.workers, force=args.force)
+	try:
+		failed = runner.run(args.targets, dry_run=args.dry_run)
+	except ValueError as e:
+		parser.error(str(e))
+
+	return 1 if failed else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
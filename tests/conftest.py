@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from source.config.config import INTENT_MEASURES
+
+
+@pytest.fixture
+def make_consolidated():
+	'''
+	Builds a consolidated (stage 2) frame with one row per (date, ticker), a column for each metric and
+	one event flag per rate. The flags are shared by every ticker on a date, like the real event dates.
+	'''
+
+	def make(n_dates:int=400, factor_rates:list=[0.2, 0.5], seed:int=0):
+		rng = np.random.default_rng(seed)
+		dates = pd.date_range("2010-01-01", periods=n_dates, freq="B")
+		tickers = ["XLB", "XLE", "XLF", "XLK"]
+		n = n_dates * len(tickers)
+
+		df = pd.DataFrame({"date": np.repeat(dates, len(tickers)), "ticker": np.tile(tickers, n_dates)})
+		for metric in sorted(set().union(*INTENT_MEASURES.values())):
+			df[metric] = rng.normal(0, 0.01, n)
+			df.loc[rng.random(n) < 0.1, metric] = np.nan
+
+		factors = [f"factor_{i}" for i in range(len(factor_rates))]
+		flags = pd.DataFrame((rng.random((n_dates, len(factors))) < factor_rates).astype(int), index=dates, columns=factors)
+		return df.join(flags, on="date"), factors
+
+	return make
+
+
+@pytest.fixture
+def from_consolidated():
+	'''Builds a dataset class over a consolidated frame, without reading the saved csv.'''
+
+	def build(cls, df:pd.DataFrame, factors:list):
+		dataset = cls.__new__(cls)
+		dataset.ticker_event_dates = SimpleNamespace(df=df, event_dates=SimpleNamespace(column_list=factors))
+		dataset.factors = factors
+		return dataset
+
+	return build
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from source.modules.compute_comovement import ComputeCoMovement
+
+
+# pandas warns about the factor with a single event day.
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_comovement_matches_pandas_per_factor(make_consolidated, from_consolidated):
+	# The last factor only has a single event day.
+	df, factors = make_consolidated(factor_rates=[0.2, 0.5, 0])
+	df.loc[df["date"] == df["date"].iloc[40], factors[-1]] = 1
+
+	df_comovement = from_consolidated(ComputeCoMovement, df, factors) \
+		.get_comovement(["price_chg_c2c"]) \
+		.set_index(["factor", "ticker_i", "ticker_j"])
+
+	for factor in factors:
+		df_pivoted = df.loc[df[factor] == 1].pivot(index="date", columns="ticker", values="price_chg_c2c")
+		expected_cov, expected_corr = df_pivoted.cov(), df_pivoted.corr()
+
+		for (ticker_i, ticker_j), row in df_comovement.loc[factor].iterrows():
+			assert row["price_chg_c2c_n"] == df_pivoted[[ticker_i, ticker_j]].dropna().shape[0]
+			np.testing.assert_allclose(row["price_chg_c2c_cov"], expected_cov.loc[ticker_i, ticker_j], rtol=1e-9, atol=1e-15)
+			np.testing.assert_allclose(row["price_chg_c2c_corr"], expected_corr.loc[ticker_i, ticker_j], rtol=1e-9)
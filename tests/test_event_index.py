@@ -0,0 +1,73 @@
+import os
+import numpy as np
+import pandas as pd
+
+from source.modules.consolidate_eventdates import GetEventDates
+from source.modules.event_index import EventIndex
+
+
+def write_calendar(dataset_dir, filename, columns, mtime=None):
+	filepath = os.path.join(dataset_dir, filename)
+	pd.DataFrame(columns).to_csv(filepath, index=False)
+	if mtime is not None:
+		os.utime(filepath, (mtime, mtime))
+
+
+def test_dates_for_and_events_on():
+	df = pd.DataFrame({
+		"event": ["a", "a", "a", "b", "b"],
+		"date": ["2020-01-03", "2020-01-02", "2020-01-03", "2020-01-03", None],
+	})
+	index = EventIndex.from_frame(df)
+
+	assert index.events.tolist() == ["a", "b"]
+	assert index.dates_for("a").astype(str).tolist() == ["2020-01-02", "2020-01-03"]
+	assert index.events_on("2020-01-03") == ["a", "b"]
+	assert index.events_on("2020-01-04") == []
+	np.testing.assert_array_equal(
+		index.flags(["2020-01-02", "2020-01-03", "2020-01-06"]),
+		[[1, 0], [1, 1], [0, 0]],
+	)
+
+
+def test_dates_before_1970_are_kept():
+	df = pd.DataFrame({"event": ["a", "a", "a", "a"], "date": ["1965-01-04", "1969-12-31", "2020-01-02", "unknown"]})
+	index = EventIndex.from_frame(df)
+
+	assert index.dates_for("a").astype(str).tolist() == ["1965-01-04", "1969-12-31", "2020-01-02"]
+	assert index.events_on("1969-12-31") == ["a"]
+
+	# A date which can't be parsed doesn't match any day.
+	np.testing.assert_array_equal(index.flags(["unknown", "1969-12-31"]), [[0], [1]])
+
+
+def test_save_and_load_keep_sources(tmp_path):
+	index = EventIndex.from_frame(pd.DataFrame({"event": ["a"], "date": ["2020-01-02"]}), sources=[("a.csv", 1, 2)])
+	index.save(tmp_path / "index.npz")
+
+	loaded = EventIndex.load(tmp_path / "index.npz")
+	assert loaded.sources == [("a.csv", 1, 2)]
+	assert loaded.dates_for("a").astype(str).tolist() == ["2020-01-02"]
+
+
+def test_index_rebuilt_when_a_calendar_is_added_or_removed(tmp_path):
+	dataset_dir = str(tmp_path)
+	write_calendar(dataset_dir, "old.csv", {"ev_old": ["2020-01-06"]}, mtime=1_000_000)
+	write_calendar(dataset_dir, "a.csv", {"ev_a": ["2020-01-02"]})
+
+	assert GetEventDates(dataset_dir=dataset_dir, events_filenames=["a.csv"]).column_list == ["ev_a"]
+
+	# The added calendar is older than the cached index but must still be picked up.
+	event_dates = GetEventDates(dataset_dir=dataset_dir, events_filenames=["a.csv", "old.csv"])
+	assert event_dates.column_list == ["ev_a", "ev_old"]
+
+	assert GetEventDates(dataset_dir=dataset_dir, events_filenames=["old.csv"]).column_list == ["ev_old"]
+
+
+def test_index_rebuilt_when_a_calendar_changes(tmp_path):
+	dataset_dir = str(tmp_path)
+	write_calendar(dataset_dir, "a.csv", {"ev_a": ["2020-01-02"]}, mtime=1_000_000)
+	assert GetEventDates(dataset_dir=dataset_dir, events_filenames=["a.csv"]).column_list == ["ev_a"]
+
+	write_calendar(dataset_dir, "a.csv", {"ev_b": ["2020-01-02"]}, mtime=2_000_000)
+	assert GetEventDates(dataset_dir=dataset_dir, events_filenames=["a.csv"]).column_list == ["ev_b"]
@@ -0,0 +1,86 @@
+from collections import deque
+
+import pandas as pd
+import pytest
+
+alt = pytest.importorskip("altair")
+
+import source.modules.explore_visuals as explore_visuals
+from source.modules.explore_visuals import ChartSpec, cache_chart, chart_cache, enable_data_transformer, plot_heatmap
+
+
+@cache_chart(columns=lambda a: ["factor", a["x"]])
+def plot_points(df:pd.DataFrame, x:str, factors:list):
+	# Inline records so the test doesn't depend on altair supporting the installed pandas.
+	records = df.loc[df["factor"].isin(factors), ["factor", x]].astype(object).to_dict("records")
+	return alt.Chart(alt.InlineData(values=records)).mark_point().encode(x=f"{x}:Q", y="factor:N")
+
+
+def can_render_dataframes():
+	try:
+		alt.Chart(pd.DataFrame({"a": ["b"]})).mark_point().to_dict()
+		return True
+	except TypeError:
+		return False
+
+
+@pytest.fixture(autouse=True)
+def data_transformer(tmp_path, monkeypatch):
+	# Write the chart data as json files in a temporary directory.
+	monkeypatch.setattr(explore_visuals, "PROJECT_DIR", str(tmp_path))
+	active = alt.data_transformers.active
+	enable_data_transformer("json")
+	chart_cache.clear()
+	yield
+	alt.data_transformers.enable(active)
+	chart_cache.clear()
+
+
+@pytest.fixture
+def df():
+	return pd.DataFrame({
+		"factor": pd.Categorical(["fomc", "fomc", "opec", "opec"]),
+		"z": [0.1, 0.2, 0.3, 0.4],
+		"unused": [1, 2, 3, 4],
+	})
+
+
+def test_chart_is_cached_on_the_plotted_columns(df):
+	chart = plot_points(df, "z", factors=["fomc", "opec"])
+
+	# Unrelated columns don't change the key, the plotted ones do.
+	assert plot_points(df.assign(unused=0), "z", ["fomc", "opec"]) is chart
+	assert plot_points(df.assign(z=0.5), "z", factors=["fomc", "opec"]) is not chart
+	assert (chart_cache.hits, chart_cache.misses) == (1, 2)
+
+
+def test_cache_holds_the_rendered_spec(df):
+	chart = plot_points(df, "z", factors=["fomc"])
+
+	assert isinstance(chart, ChartSpec)
+	assert list(chart.spec["datasets"].values()) == [[{"factor": "fomc", "z": 0.1}, {"factor": "fomc", "z": 0.2}]]
+	assert chart.to_chart().to_dict() == chart.spec
+
+
+def test_other_iterables_are_cached(df):
+	expected = plot_points(df, "z", factors=["fomc", "opec"]).spec
+
+	assert plot_points(df, "z", factors={"fomc": [], "opec": []}.keys()).spec == expected
+	assert plot_points(df, "z", factors=df["factor"].unique()).spec == expected
+	# The keys are keyed like the list, the categorical by its content.
+	assert (chart_cache.hits, len(chart_cache)) == (1, 2)
+
+
+def test_unkeyable_arguments_are_not_cached(df):
+	chart = plot_points(df, "z", factors=deque(["fomc"]))
+
+	assert isinstance(chart, ChartSpec)
+	assert len(chart_cache) == 0
+
+
+@pytest.mark.skipif(not can_render_dataframes(), reason="altair doesn't support the installed pandas")
+def test_plot_heatmap_passes_the_data_by_reference(df):
+	df = df.assign(ticker=["XLF", "XLK", "XLF", "XLK"])
+	chart = plot_heatmap(df, "ticker", "factor", "z", factors=df["factor"].unique())
+
+	assert chart.spec["data"]["url"].startswith(explore_visuals.CHART_DATA_DIR)
@@ -0,0 +1,14 @@
+import os, sys, subprocess
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("module", ["source.modules.compute_aggregations", "source.modules.explore_visuals", "source.modules"])
+def test_import_does_not_load_heavy_dependencies(module):
+	# A fresh interpreter, since this one may already have imported them.
+	snippet = f"import sys, {module}; print([m for m in ['yfinance', 'altair'] if m in sys.modules])"
+	result = subprocess.run([sys.executable, "-c", snippet], capture_output=True, text=True, check=True, cwd=PROJECT_DIR)
+
+	assert result.stdout.strip() == "[]"
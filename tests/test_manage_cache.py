@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from source.modules.manage_cache import LRUCache, make_cache_key
+
+
+def test_lru_cache_evicts_least_recently_used():
+	cache = LRUCache(maxsize=2)
+	cache.put("a", 1)
+	cache.put("b", 2)
+	cache.get("a")
+	cache.put("c", 3)
+
+	assert "a" in cache and "c" in cache and "b" not in cache
+	assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_key_depends_on_dataframe_content():
+	df = pd.DataFrame({"a": [1, 2]})
+	assert make_cache_key(df) == make_cache_key(df.copy())
+	assert make_cache_key(df) != make_cache_key(df.assign(a=[1, 3]))
+
+
+def test_key_distinguishes_long_arrays():
+	# numpy shortens the repr of long arrays with (...), so they must be hashed by content.
+	factors = np.array([f"factor_{i}" for i in range(2000)], dtype=object)
+	other = factors.copy()
+	other[1000] = "other"
+
+	assert make_cache_key(factors=factors) == make_cache_key(factors=factors.copy())
+	assert make_cache_key(factors=factors) != make_cache_key(factors=other)
+	assert make_cache_key(np.arange(2000)) != make_cache_key(np.arange(2000) + (np.arange(2000) == 1000))
+	assert make_cache_key(pd.Index(factors)) != make_cache_key(pd.Index(other))
+
+
+def test_key_accepts_dict_keys_and_categoricals():
+	mapping = {"fomc": [], "opec": []}
+	assert make_cache_key(mapping.keys()) == make_cache_key(["fomc", "opec"])
+
+	categories = pd.Series(["fomc", "opec", "fomc"], dtype="category").unique()
+	assert make_cache_key(categories) == make_cache_key(categories.copy())
+	assert make_cache_key(categories) != make_cache_key(pd.Categorical(["fomc"]))
+
+
+def test_key_rejects_unsupported_types():
+	with pytest.raises(TypeError):
+		make_cache_key(object())
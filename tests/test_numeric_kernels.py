@@ -0,0 +1,180 @@
+import functools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import source.modules.compute_aggregations as compute_aggregations
+import source.modules.get_tickerdata as get_tickerdata
+from source.modules.compute_aggregations import AggregateMeasures
+from source.modules.get_tickerdata import GetTickerData, GetImpVolatility
+from source.modules.numeric_kernels import rolling_mean_std, rolling_median, masked_group_means, get_backend
+from source.config.config import INTENT_MEASURES
+
+BACKENDS = ["numpy"] + (["numba"] if get_backend("auto") == "numba" else [])
+
+
+def make_series(kind:str, n:int=800, seed:int=0):
+	rng = np.random.default_rng(seed)
+	values = rng.normal(0, 0.01, n)
+	if kind == "nan":
+		values[[0, 150, 400, 401]] = np.nan
+	elif kind == "short":
+		values = values[:50]
+	elif kind == "constant":
+		values[:] = 0.5
+	elif kind == "level":
+		# Large level with small moves. Checks precision of the variance.
+		values = 1e4 + values
+	return values
+
+
+# %%
+# Rolling statistics against pandas rolling(window, min_periods=window).
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("kind", ["random", "nan", "short", "constant", "level"])
+@pytest.mark.parametrize("window", [1, 90, 360])
+def test_rolling_mean_std_matches_pandas(backend, kind, window):
+	values = pd.Series(make_series(kind))
+	mean, std = rolling_mean_std(values, window=window, backend=backend)
+
+	expected = values.rolling(window=window, min_periods=window)
+	np.testing.assert_allclose(mean, expected.mean(), rtol=1e-9, atol=1e-12)
+	np.testing.assert_allclose(std, expected.std(ddof=1), rtol=1e-7, atol=1e-9)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("kind", ["random", "nan", "short", "constant"])
+@pytest.mark.parametrize("window", [1, 89, 90])
+def test_rolling_median_matches_pandas(backend, kind, window):
+	values = pd.Series(make_series(kind))
+	expected = values.rolling(window=window, min_periods=window).median()
+	np.testing.assert_allclose(rolling_median(values, window=window, backend=backend), expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_masked_group_means_matches_pandas(backend):
+	rng = np.random.default_rng(0)
+	df = pd.DataFrame({"group": rng.integers(0, 4, 500), "value": rng.normal(size=500)})
+	df.loc[rng.random(500) < 0.1, "value"] = np.nan
+	flags = (rng.random((500, 3)) < 0.3).astype(int)
+
+	means = masked_group_means(df["value"], df["group"], 4, flags, 1, backend=backend)
+	for f in range(3):
+		expected = df.loc[flags[:, f] == 1].groupby("group")["value"].mean().reindex(range(4))
+		np.testing.assert_allclose(means[:, f], expected, rtol=1e-12)
+
+
+# %%
+# The ticker processing against the previous pandas implementation.
+def make_history(n:int=900, seed:int=0):
+	rng = np.random.default_rng(seed)
+	df = pd.DataFrame({"open": 100 + rng.normal(size=n).cumsum(), "volume": rng.integers(1e5, 1e7, n).astype(float)})
+	df["close"] = df["open"] + rng.normal(size=n)
+	df.loc[300, "volume"] = np.nan
+	return df
+
+
+def use_backend(monkeypatch, module, backend, names):
+	for name in names:
+		monkeypatch.setattr(module, name, functools.partial(getattr(module, name), backend=backend))
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_ticker_processing_matches_pandas(monkeypatch, backend):
+	use_backend(monkeypatch, get_tickerdata, backend, ["rolling_mean_std", "rolling_median"])
+	ticker = GetTickerData.__new__(GetTickerData)
+
+	df = make_history()
+	df = ticker.compute_price_chg_tscore(ticker.compute_rolling_volume(ticker.compute_price_change(df)))
+
+	expected = make_history()
+	expected["volume_rollmed"] = expected["volume"].rolling(window=90, min_periods=90, win_type=None).median()
+	np.testing.assert_allclose(df["volume_rollmed"], expected["volume_rollmed"], rtol=1e-12)
+
+	for column in ["price_chg_c2o", "price_chg_o2c", "price_chg_c2c"]:
+		rolling = df[column].rolling(window=360, min_periods=360, win_type=None)
+		expected_tscore = (df[column] - rolling.mean()) / rolling.std(ddof=1)
+		np.testing.assert_allclose(df[column.replace("price_chg", "tscore")], expected_tscore, rtol=1e-7, atol=1e-9)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_vix_tscore_matches_pandas(monkeypatch, backend):
+	use_backend(monkeypatch, get_tickerdata, backend, ["rolling_mean_std"])
+	vix = GetImpVolatility.__new__(GetImpVolatility)
+
+	df = vix.compute_vix_chg_tscore(vix.compute_vix_change(make_history()))
+
+	# Same as the current pandas formula, which centres and scales by the rolling standard deviation.
+	vix_chg_c2c_rollstd = df["chg_c2c"].rolling(window=360, min_periods=360, win_type=None).std(ddof=1)
+	expected = (df["chg_c2c"] - vix_chg_c2c_rollstd) / vix_chg_c2c_rollstd
+	np.testing.assert_allclose(df["tscore_c2c"], expected, rtol=1e-7, atol=1e-9)
+
+
+# %%
+# The aggregation against the previous pandas implementation (one pivot table per factor).
+def pandas_get_aggregation(df_tickers:pd.DataFrame, factors:list, intent_measure:dict):
+	df_consolidated_agg = pd.DataFrame()
+	arr_tickers, arr_factors = [], []
+
+	for intent_measure, metrics in intent_measure.items():
+		for metric in metrics:
+			for measure_event_period in [0, 1]:
+				df_aggregates = pd.DataFrame()
+				for factor in factors:
+					df_processed = df_tickers.loc[df_tickers[factor] == measure_event_period, :].copy()
+					if intent_measure == "mag":
+						df_processed.loc[:, metric] = df_processed.loc[:, metric].abs()
+					if intent_measure in ["dir", "abv"]:
+						df_processed.loc[df_processed[metric] <= 0, metric] = 0
+						df_processed.loc[df_processed[metric] > 0, metric] = 1
+
+					df_pivottable = df_processed.pivot_table(values=metric, index="ticker", columns=factor, aggfunc="mean")
+					df_pivottable.columns = [factor]
+					df_aggregates = pd.concat([df_aggregates, df_pivottable], axis="columns")
+
+				df_aggregates = df_aggregates \
+					.reset_index(drop=False) \
+					.melt(id_vars="ticker", var_name="factor", value_vars=df_aggregates.columns, value_name=metric)
+
+				metric_newname = f"{metric}_{intent_measure}_{measure_event_period}"
+				df_consolidated_agg[metric_newname] = df_aggregates[metric].to_numpy()
+
+				if not arr_tickers and not arr_factors:
+					arr_tickers = df_aggregates["ticker"].to_list()
+					arr_factors = df_aggregates["factor"].to_list()
+
+			if intent_measure == "mag":
+				df_consolidated_agg[f"{metric}_{intent_measure}_diff"] = \
+					df_consolidated_agg[f"{metric}_{intent_measure}_1"] - df_consolidated_agg[f"{metric}_{intent_measure}_0"]
+
+	df_consolidated_agg.insert(0, "ticker", arr_tickers)
+	df_consolidated_agg.insert(1, "factor", arr_factors)
+	return df_consolidated_agg
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_get_aggregation_matches_pandas(monkeypatch, make_consolidated, from_consolidated, backend):
+	use_backend(monkeypatch, compute_aggregations, backend, ["masked_group_means"])
+	df, factors = make_consolidated(n_dates=750, factor_rates=[0.2] * 6)
+
+	actual = from_consolidated(AggregateMeasures, df, factors).get_aggregation(INTENT_MEASURES)
+	expected = pandas_get_aggregation(df, factors, INTENT_MEASURES)
+
+	assert actual.columns.to_list() == expected.columns.to_list()
+	pd.testing.assert_frame_equal(actual[["ticker", "factor"]], expected[["ticker", "factor"]])
+	np.testing.assert_allclose(
+		actual.iloc[:, 2:].to_numpy(dtype=float), expected.iloc[:, 2:].to_numpy(dtype=float), rtol=1e-9, atol=1e-12,
+	)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_get_aggregation_without_event_days(monkeypatch, make_consolidated, from_consolidated, backend):
+	# The pandas version shifted the rows of the other tickers here, so only check the missing values.
+	use_backend(monkeypatch, compute_aggregations, backend, ["masked_group_means"])
+	df, factors = make_consolidated(n_dates=750, factor_rates=[0.2] * 6)
+	df.loc[df["ticker"] == "XLE", "factor_0"] = 0
+
+	actual = from_consolidated(AggregateMeasures, df, factors).get_aggregation(INTENT_MEASURES).set_index(["ticker", "factor"])
+	assert actual.loc[("XLE", "factor_0"), [c for c in actual.columns if c.endswith("_1")]].isna().all()
+	assert actual.drop(index=("XLE", "factor_0")).filter(like="_1").notna().all().all()
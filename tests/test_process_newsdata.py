@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+import source.modules.process_newsdata as process_newsdata
+from source.modules.process_newsdata import ProcessNewsData
+
+KEYWORDS = {"fed": ["federal reserve", "fomc"], "oil": ["crude", "opec"]}
+
+HEADLINES = [
+	("Federal Reserve holds rates", "2020-01-02 10:30:00"),
+	("Crude falls on supply", "2020-01-03 09:00:00"),
+	("Stocks rally", "2020-01-06 16:00:00"),
+	("OPEC meets next week", "2020-01-07 11:00:00"),
+]
+
+# Appended later. The second one is a late headline with an earlier date.
+APPENDED = [
+	("FOMC minutes released", "2020-01-08 14:00:00"),
+	("Crude jumps after report", "2019-12-30 08:00:00"),
+]
+
+
+@pytest.fixture(autouse=True)
+def keywords(monkeypatch):
+	monkeypatch.setattr(process_newsdata, "NEWS_KEYWORDS_MAPPING", dict(KEYWORDS))
+
+
+def write_articles(tmp_path, rows):
+	df = pd.DataFrame(rows, columns=["headline", "date"])
+	df.insert(1, "stock", "XLF")
+	df.to_csv(tmp_path / "raw_partner_headlines.csv", index=True)
+
+
+def append_articles(tmp_path, rows, start):
+	df = pd.DataFrame(rows, columns=["headline", "date"], index=range(start, start + len(rows)))
+	df.insert(1, "stock", "XLF")
+	df.to_csv(tmp_path / "raw_partner_headlines.csv", mode="a", header=False, index=True)
+
+
+def run(tmp_path, incremental):
+	news = ProcessNewsData(use_csv=False, incremental=incremental, dataset_dir=str(tmp_path))
+	if incremental:
+		news.write_to_csv()
+	return news.df
+
+
+def test_incremental_run_equals_full_run(tmp_path, capsys):
+	write_articles(tmp_path, HEADLINES)
+	run(tmp_path, incremental=True)
+
+	append_articles(tmp_path, APPENDED, len(HEADLINES))
+	capsys.readouterr()
+	df = run(tmp_path, incremental=True)
+
+	# Only the appended headlines are scanned.
+	assert "Scanning 2 new headlines for (fed, oil)" in capsys.readouterr().out
+	pd.testing.assert_frame_equal(df, run(tmp_path, incremental=False))
+	assert df["oil"].to_list() == ["2019-12-30", "2020-01-03", "2020-01-07"]
+
+
+def test_rewritten_archive_is_scanned_again(tmp_path):
+	write_articles(tmp_path, HEADLINES)
+	run(tmp_path, incremental=True)
+
+	# Edit a processed headline so it no longer matches.
+	write_articles(tmp_path, [("Rates unchanged", HEADLINES[0][1])] + HEADLINES[1:] + APPENDED)
+	df = run(tmp_path, incremental=True)
+
+	pd.testing.assert_frame_equal(df, run(tmp_path, incremental=False))
+	assert df["fed"].dropna().to_list() == ["2020-01-08"]
+
+
+def test_edited_keywords_are_scanned_again(tmp_path, monkeypatch):
+	write_articles(tmp_path, HEADLINES)
+	run(tmp_path, incremental=True)
+
+	monkeypatch.setattr(process_newsdata, "NEWS_KEYWORDS_MAPPING", {**KEYWORDS, "fed": ["rates"]})
+	append_articles(tmp_path, APPENDED, len(HEADLINES))
+	df = run(tmp_path, incremental=True)
+
+	pd.testing.assert_frame_equal(df, run(tmp_path, incremental=False))
+	assert df["fed"].dropna().to_list() == ["2020-01-02"]
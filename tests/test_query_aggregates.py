@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from source.modules.query_aggregates import AggregateQueryService, AggregateQueryServer, AggregateQueryClient
+
+
+@pytest.fixture
+def client():
+	df = pd.DataFrame({
+		"ticker": ["XLF", "XLK", "XLF", "XLK"],
+		"factor": ["fomc", "fomc", "war, conflict", "war, conflict"],
+		"tscore_c2c_mag_1": [0.5, 1.5, 2.5, 3.5],
+	})
+
+	# Port 0 lets the system pick a free port.
+	server = AggregateQueryServer(AggregateQueryService(df_aggregates=df), host="127.0.0.1", port=0)
+	server.start_in_background()
+	yield AggregateQueryClient(host="127.0.0.1", port=server.server_address[1])
+	server.shutdown()
+	server.server_close()
+
+
+def test_lists_are_sent_as_repeated_parameters(client):
+	df = client.filter(tickers=["XLF", "XLK"], factors=["war, conflict"])
+	assert df["factor"].to_list() == ["war, conflict", "war, conflict"]
+	assert df["tscore_c2c_mag_1"].to_list() == [2.5, 3.5]
+
+
+def test_queries_match_the_service(client):
+	df = client.top_k("tscore_c2c_mag_1", k=1, factors=["fomc"])
+	assert df[["ticker", "factor"]].values.tolist() == [["XLK", "fomc"]]
+
+	df = client.threshold("tscore_c2c_mag_1", lower=1, upper=3, tickers=["XLF"])
+	assert df["factor"].to_list() == ["war, conflict"]
+
+	with pytest.raises(ValueError):
+		client.filter(metrics=["unknown"])
@@ -0,0 +1,113 @@
+import os, time, functools
+
+from source.modules.run_pipeline import PipelineRunner
+
+
+# Stage functions run in worker processes, so they have to be importable at module level.
+def run_stage(dataset_dir:str, name:str, fail:bool=False, wait_for:str=None):
+	with open(os.path.join(dataset_dir, "runs.log"), "a") as f:
+		f.write(f"{name}\n")
+	open(os.path.join(dataset_dir, f"{name}.started"), "w").close()
+
+	# Only finishes if the other stage starts while this one is running.
+	if wait_for is not None:
+		deadline = time.time() + 10
+		while not os.path.exists(os.path.join(dataset_dir, f"{wait_for}.started")):
+			if time.time() > deadline:
+				raise RuntimeError(f"({wait_for}) didn't run at the same time")
+			time.sleep(0.01)
+
+	if fail:
+		raise RuntimeError(f"({name}) failed")
+
+	with open(os.path.join(dataset_dir, f"{name}.csv"), "w") as f:
+		f.write(name)
+
+
+def make_stage(dataset_dir, name:str, deps:list=[], inputs:list=[], **kwargs):
+	return {
+		"func": functools.partial(run_stage, str(dataset_dir), name, **kwargs),
+		"deps": deps, "inputs": inputs, "outputs": [f"{name}.csv"],
+	}
+
+
+def read_runs(dataset_dir):
+	filepath = os.path.join(dataset_dir, "runs.log")
+	if not os.path.exists(filepath):
+		return []
+	with open(filepath) as f:
+		runs = f.read().split()
+	os.remove(filepath)
+	return sorted(runs)
+
+
+def make_runner(dataset_dir, **kwargs):
+	# (a) and (b) are independent. (c) depends on (a) and (d) depends on (c).
+	stages = {
+		"a": make_stage(dataset_dir, "a", inputs=["raw.csv"], **kwargs.pop("a", {})),
+		"b": make_stage(dataset_dir, "b", **kwargs.pop("b", {})),
+		"c": make_stage(dataset_dir, "c", deps=["a"], **kwargs.pop("c", {})),
+		"d": make_stage(dataset_dir, "d", deps=["c"]),
+	}
+	(dataset_dir / "raw.csv").write_text("raw")
+	return PipelineRunner(stages=stages, dataset_dir=str(dataset_dir), max_workers=2, **kwargs)
+
+
+def test_independent_stages_run_concurrently(tmp_path):
+	runner = make_runner(tmp_path, a={"wait_for": "b"}, b={"wait_for": "a"})
+
+	assert runner.run() == []
+	assert read_runs(tmp_path) == ["a", "b", "c", "d"]
+
+
+def test_current_stages_are_skipped(tmp_path, capsys):
+	runner = make_runner(tmp_path)
+	runner.run()
+	read_runs(tmp_path)
+
+	assert runner.run() == []
+	assert read_runs(tmp_path) == []
+	assert "[d] Up to date" in capsys.readouterr().out
+
+	# Forcing reruns every stage.
+	runner.force = True
+	runner.run()
+	assert read_runs(tmp_path) == ["a", "b", "c", "d"]
+
+
+def test_stages_downstream_of_a_rebuilt_stage_rerun(tmp_path):
+	runner = make_runner(tmp_path)
+	runner.run()
+	read_runs(tmp_path)
+
+	# Only the input of (a) changes.
+	future = time.time() + 60
+	os.utime(tmp_path / "raw.csv", (future, future))
+
+	assert runner.run() == []
+	assert read_runs(tmp_path) == ["a", "c", "d"]
+
+
+def test_stages_downstream_of_a_failure_are_skipped(tmp_path, capsys):
+	runner = make_runner(tmp_path, c={"fail": True})
+
+	assert runner.run() == ["c", "d"]
+	assert read_runs(tmp_path) == ["a", "b", "c"]
+	assert "[d] Skipped, upstream stage failed" in capsys.readouterr().out
+	assert not (tmp_path / "d.csv").exists()
+
+
+def test_output_filename_is_resolved_as_target(tmp_path):
+	runner = make_runner(tmp_path)
+
+	assert runner.get_required_stages(["c.csv"]) == ["a", "c"]
+	assert runner.run(["c.csv"]) == []
+	assert read_runs(tmp_path) == ["a", "c"]
+
+
+def test_dry_run_only_prints_the_stages(tmp_path, capsys):
+	runner = make_runner(tmp_path)
+
+	assert runner.run(["d"], dry_run=True) == []
+	assert read_runs(tmp_path) == []
+	assert "[d] Would run" in capsys.readouterr().out